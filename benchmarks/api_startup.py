@@ -0,0 +1,60 @@
+"""
+Import time and memory of the API entry point, next to the worker's.
+
+Imports each module in a fresh interpreter and reports wall time, peak
+RSS and whether any ML library was loaded. Importing server.app connects
+to the configured database, like the API does on boot.
+
+    python -m benchmarks.api_startup --repeats 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "api (server.app)": "server.app",
+    "worker (server.queue.tasks)": "server.queue.tasks",
+}
+
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "nltk"]
+
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+}}))
+"""
+
+
+def probe(module: str) -> dict:
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'entry point':<30}{'import (s)':>12}{'peak RSS (MB)':>16}  heavy modules")
+    for label, module in ENTRY_POINTS.items():
+        samples = [probe(module) for _ in range(args.repeats)]
+        seconds = statistics.median(sample["seconds"] for sample in samples)
+        rss = statistics.median(sample["rss_mb"] for sample in samples)
+        heavy = ", ".join(samples[-1]["heavy"]) or "-"
+        print(f"{label:<30}{seconds:>12.2f}{rss:>16.0f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Identity and stance marker counting time, the previous per-category regex
+passes against the lexicon matcher in server/analysis/lexicon.py.
+
+Runs both on synthetic lowercase content at each size (no database
+needed), checks that they return exactly the same results and that a
+dataset's own lexicon categories, overlapping the built-in phrases or
+not, leave the built-in counts unchanged. Reports the time of each.
+
+    python -m benchmarks.cultural_markers --events 10000,100000,1000000
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from server.analysis.cultural import CulturalAnalysis
+from server.analysis.lexicon import MARKER_LEXICON, Lexicon
+from server.analysis.tokens import TokenStore
+
+EXTRAS = ["i", "think", "kind", "of", "have", "to", "the", "city", "dublin", "can't", "we're", "okay!"]
+
+# Categories a dataset might add, sharing no word with the built-in ones
+# and sharing some
+CUSTOM_LEXICONS = {
+    "disjoint": {"place": ["dublin", "the city"]},
+    "overlapping": {"collective": ["we need", "we must", "kind of us"]},
+}
+
+
+class LegacyCulturalAnalysis(CulturalAnalysis):
+    """Identity and stance markers as they were before the lexicon matcher."""
+
+    def _legacy_counts(self, tokens: TokenStore) -> dict[str, pd.Series]:
+        s = tokens.text("lowered")
+        return {
+            category: s.str.count(re.compile(rf"\b({'|'.join(phrases)})\b"))
+            for category, phrases in MARKER_LEXICON.items()
+        }
+
+    def get_identity_markers(self, original_df, tokens=None, lexicon=None):
+        counts = self._legacy_counts(tokens)
+        total_tokens = tokens.token_counts("lowered").sum()
+
+        in_hits, out_hits = counts["in_group"], counts["out_group"]
+        in_count, out_count = int(in_hits.sum()), int(out_hits.sum())
+        in_mask, out_mask = in_hits > out_hits, out_hits > in_hits
+
+        result = {
+            "in_group_usage": in_count,
+            "out_group_usage": out_count,
+            "in_group_ratio": round(in_count / max(total_tokens, 1), 5),
+            "out_group_ratio": round(out_count / max(total_tokens, 1), 5),
+            "in_group_posts": int(in_mask.sum()),
+            "out_group_posts": int(out_mask.sum()),
+            "tie_posts": int((~(in_mask | out_mask)).sum()),
+        }
+
+        emo = original_df[self._emotion_columns(original_df)]
+        result["in_group_emotion_avg"] = self._emotion_avg(emo, in_mask)
+        result["out_group_emotion_avg"] = self._emotion_avg(emo, out_mask)
+        return result
+
+    def get_stance_markers(self, df, tokens=None, lexicon=None):
+        counts = self._legacy_counts(tokens)
+        token_count = tokens.token_counts("lowered").replace(0, 1).sum()
+        categories = ["hedge", "certainty", "deontic", "permission"]
+
+        result = {f"{c}_total": int(counts[c].sum()) for c in categories}
+        result.update(
+            {f"{c}_per_1k_tokens": round(1000 * counts[c].sum() / token_count, 3) for c in categories}
+        )
+
+        emo = df[self._emotion_columns(df)]
+        for c in categories:
+            result[f"{c}_emotion_avg"] = self._emotion_avg(emo, counts[c] > 0)
+        return result
+
+
+def synthetic_content(events: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    vocab = np.array(
+        [phrase for phrases in MARKER_LEXICON.values() for phrase in phrases]
+        + EXTRAS
+        + [f"word{i}" for i in range(5000)],
+        dtype=object,
+    )
+    lengths = rng.integers(0, 40, events)
+    words = vocab[rng.integers(0, len(vocab), int(lengths.sum()))]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+
+    content = [" ".join(words[bounds[i] : bounds[i + 1]]) for i in range(events)]
+    content[::50] = [None] * len(content[::50])
+
+    return pd.DataFrame(
+        {
+            "content": content,
+            "emotion_joy": rng.random(events),
+            "emotion_anger": rng.random(events),
+        }
+    )
+
+
+def run(analysis: CulturalAnalysis, df: pd.DataFrame, lexicon: Lexicon | None = None) -> dict:
+    # One store per run, like StatGen.cultural
+    tokens = TokenStore.from_frame(df)
+    return {
+        "identity_markers": analysis.get_identity_markers(df, tokens=tokens, lexicon=lexicon),
+        "stance_markers": analysis.get_stance_markers(df, tokens=tokens, lexicon=lexicon),
+    }
+
+
+def median_seconds(function, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", default="10000,100000,1000000")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = LegacyCulturalAnalysis()
+    engine = CulturalAnalysis()
+
+    print(f"{'events':>10}{'legacy (s)':>14}{'engine (s)':>14}{'speedup':>10}")
+    for events in (int(size) for size in args.events.split(",")):
+        df = synthetic_content(events)
+
+        expected = run(legacy, df)
+        if run(engine, df) != expected:
+            raise SystemExit(f"Results differ from the legacy implementation at {events:,} events")
+
+        for name, lexicons in CUSTOM_LEXICONS.items():
+            if run(engine, df, Lexicon.from_dict(lexicons)) != expected:
+                raise SystemExit(f"The {name} custom lexicon changed the built-in counts")
+
+        legacy_s = median_seconds(lambda: run(legacy, df), args.repeats)
+        engine_s = median_seconds(lambda: run(engine, df), args.repeats)
+
+        speedup = legacy_s / max(engine_s, 1e-9)
+        print(f"{events:>10,}{legacy_s:>14.2f}{engine_s:>14.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Read latency on the events table before and after the access-path indexes
+from server/db/migrations/0001_access_path_indexes.sql.
+
+Seeds a scratch user with several synthetic datasets (default 3M events in
+total), times the DatasetManager access paths with the indexes dropped and
+then recreated, and removes everything it created afterwards.
+
+    python -m benchmarks.events_indexes --events 3000000 --datasets 30
+"""
+
+import argparse
+import statistics
+import time
+import uuid
+
+from server.db.database import get_connector
+from server.db.migrate import MIGRATIONS_DIR
+
+INDEX_MIGRATION = MIGRATIONS_DIR / "0001_access_path_indexes.sql"
+INDEX_NAMES = [
+    "events_dataset_dt_idx",
+    "events_dataset_source_idx",
+    "events_dataset_author_idx",
+    "datasets_user_id_idx",
+]
+
+QUERIES = {
+    "dataset content": "SELECT * FROM events WHERE dataset_id = %(dataset_id)s",
+    "dataset date window": (
+        "SELECT * FROM events WHERE dataset_id = %(dataset_id)s "
+        "AND dt >= NOW() - INTERVAL '7 days'"
+    ),
+    "dataset source": (
+        "SELECT * FROM events WHERE dataset_id = %(dataset_id)s AND source = 'reddit'"
+    ),
+    "dataset author": (
+        "SELECT * FROM events WHERE dataset_id = %(dataset_id)s AND author = 'user_42'"
+    ),
+    "user datasets": "SELECT * FROM datasets WHERE user_id = %(user_id)s",
+    "dataset delete (rolled back)": "DELETE FROM events WHERE dataset_id = %(dataset_id)s",
+}
+
+
+def seed(db, events: int, datasets: int) -> tuple[int, list[int]]:
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    user = db.execute(
+        """
+        INSERT INTO users (username, email, password_hash)
+        VALUES (%s, %s, 'x') RETURNING id
+        """,
+        (name, f"{name}@example.com"),
+        fetch=True,
+    )[0]["id"]
+
+    dataset_ids = []
+    per_dataset = events // datasets
+
+    for i in range(datasets):
+        dataset_id = db.execute(
+            "INSERT INTO datasets (user_id, name) VALUES (%s, %s) RETURNING id",
+            (user, f"{name}_{i}"),
+            fetch=True,
+        )[0]["id"]
+        dataset_ids.append(dataset_id)
+
+        db.execute(
+            """
+            INSERT INTO events (
+                dataset_id, post_id, type, author, content, timestamp, date,
+                dt, hour, weekday, source
+            )
+            SELECT
+                %(dataset_id)s,
+                'p' || g,
+                CASE WHEN g %% 5 = 0 THEN 'post' ELSE 'comment' END,
+                'user_' || (g %% 5000),
+                repeat('lorem ipsum dolor sit amet ', 8),
+                extract(epoch FROM ts)::bigint,
+                ts::date,
+                ts,
+                extract(hour FROM ts)::int,
+                to_char(ts, 'FMDay'),
+                (ARRAY['reddit', 'youtube', 'boards.ie'])[1 + g %% 3]
+            FROM generate_series(1, %(rows)s) AS g,
+                LATERAL (SELECT NOW() - (g || ' minutes')::interval AS ts) AS t
+            """,
+            {"dataset_id": dataset_id, "rows": per_dataset},
+        )
+
+    db.execute("ANALYZE events")
+    db.execute("ANALYZE datasets")
+    return user, dataset_ids
+
+
+def time_queries(db, user_id: int, dataset_id: int, repeats: int) -> dict[str, float]:
+    params = {"user_id": user_id, "dataset_id": dataset_id}
+    results = {}
+
+    for label, query in QUERIES.items():
+        samples = []
+        for _ in range(repeats):
+            with db.connection() as connection:
+                with connection.cursor() as cursor:
+                    start = time.perf_counter()
+                    cursor.execute(query, params)
+                    if cursor.description:
+                        cursor.fetchall()
+                    samples.append(time.perf_counter() - start)
+                connection.rollback()
+
+        results[label] = statistics.median(samples) * 1000
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=3_000_000)
+    parser.add_argument("--datasets", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    db = get_connector()
+    print(f"Seeding {args.events:,} events across {args.datasets} datasets...")
+    user_id, dataset_ids = seed(db, args.events, args.datasets)
+    target = dataset_ids[len(dataset_ids) // 2]
+
+    try:
+        for index in INDEX_NAMES:
+            db.execute(f"DROP INDEX IF EXISTS {index}")
+        before = time_queries(db, user_id, target, args.repeats)
+
+        db.execute(INDEX_MIGRATION.read_text())
+        db.execute("ANALYZE events")
+        after = time_queries(db, user_id, target, args.repeats)
+    finally:
+        # ON DELETE CASCADE removes the datasets and their events
+        db.execute("DELETE FROM users WHERE id = %s", (user_id,))
+        db.execute(INDEX_MIGRATION.read_text())
+
+    print(f"\n{'query':<30}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for label in QUERIES:
+        speedup = before[label] / max(after[label], 1e-9)
+        print(f"{label:<30}{before[label]:>14.2f}{after[label]:>14.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
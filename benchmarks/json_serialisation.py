@@ -0,0 +1,114 @@
+"""
+Serialisation time of each analysis response, Flask's default JSON
+provider against the orjson provider in server/core/serialization.py.
+
+Runs every StatGen analysis on a synthetic events frame (no database
+needed), then times serialising each result with both providers.
+
+    python -m benchmarks.json_serialisation --events 200000
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+from flask.json.provider import DefaultJSONProvider
+
+from server.analysis.stat_gen import ANALYSES, EMOTION_COLUMNS, StatGen
+from server.core.serialization import dumps
+
+WORDS = (
+    "government housing policy election council transport climate budget "
+    "school hospital rent market club match league weather traffic water"
+).split()
+
+
+def synthetic_events(events: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dt = pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(
+        rng.integers(0, 90 * 24 * 60, events), unit="m"
+    )
+    is_post = rng.random(events) < 0.2
+    post_ids = np.array([f"p{i}" for i in range(events)])
+
+    emotions = rng.dirichlet(np.ones(len(EMOTION_COLUMNS)), events)
+    content = [
+        " ".join(rng.choice(WORDS, rng.integers(5, 40))) for _ in range(events)
+    ]
+
+    df = pd.DataFrame(
+        {
+            "id": np.arange(1, events + 1),
+            "post_id": post_ids,
+            "type": np.where(is_post, "post", "comment"),
+            "author": [f"user_{i}" for i in rng.integers(0, max(events // 20, 1), events)],
+            "title": np.where(is_post, "Thread title", None),
+            "content": content,
+            "dt": dt,
+            "date": dt.date,
+            "hour": dt.hour,
+            "weekday": dt.day_name(),
+            "reply_to": np.where(
+                is_post, None, post_ids[rng.integers(0, events, events)]
+            ),
+            "source": rng.choice(["reddit", "youtube", "boards.ie"], events),
+            "topic": rng.choice(["Politics", "Sport", "Housing", "Misc"], events),
+            "ner_entities": [[{"text": "Dublin", "label": "GPE"}]] * events,
+        }
+    )
+    df[EMOTION_COLUMNS] = emotions
+    df.attrs["prefiltered"] = True
+    return df
+
+
+def median_ms(function, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"Generating {args.events:,} events and running analyses...")
+    df = synthetic_events(args.events)
+    stat_gen = StatGen()
+
+    # Same settings DefaultJSONProvider uses outside debug mode
+    def flask_dumps(result):
+        return json.dumps(
+            result,
+            default=DefaultJSONProvider.default,
+            ensure_ascii=True,
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+
+    print(f"\n{'analysis':<16}{'size (KB)':>12}{'flask (ms)':>14}{'orjson (ms)':>14}{'speedup':>10}")
+    for analysis in ANALYSES:
+        result = getattr(stat_gen, analysis)(df, dataset_id=0)
+        size = len(dumps(result)) / 1024
+
+        orjson_ms = median_ms(lambda: dumps(result), args.repeats)
+        try:
+            flask_ms = median_ms(lambda: flask_dumps(result), args.repeats)
+        except TypeError:
+            # numpy values the stdlib encoder cannot handle
+            print(f"{analysis:<16}{size:>12.1f}{'unsupported':>14}{orjson_ms:>14.2f}{'':>10}")
+            continue
+
+        speedup = flask_ms / max(orjson_ms, 1e-9)
+        print(f"{analysis:<16}{size:>12.1f}{flask_ms:>14.2f}{orjson_ms:>14.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
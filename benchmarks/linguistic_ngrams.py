@@ -0,0 +1,172 @@
+"""
+Word frequency and n-gram counting time, the previous Counter-based
+LinguisticAnalysis against the integer-id engine in server/analysis/ngrams.py.
+
+Runs both on synthetic content at each size (no database needed), checks
+that they return exactly the same results and reports the time of each.
+"Cached tokens" reruns the new engine on an already tokenised store, as
+when other analyses of the same dataset version ran before.
+
+    python -m benchmarks.linguistic_ngrams --events 10000,100000,1000000
+"""
+
+import argparse
+import re
+import statistics
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from server.analysis.linguistic import LinguisticAnalysis
+from server.analysis.stat_gen import exclude_words
+from server.analysis.tokens import TokenStore
+
+EXTRAS = ["the", "and", "would", "post", "Dublin", "http://example.com/a", "&amp;", "photo.jpg"]
+
+
+class LegacyLinguisticAnalysis(LinguisticAnalysis):
+    """word_frequencies and ngrams as they were before the integer-id engine."""
+
+    def _tokenize(self, text: str, *, include_exclusions: bool = False) -> list[str]:
+        pattern = rf"\b[a-z]{{{self.ngram_config.min_token_length},}}\b"
+        tokens = re.findall(pattern, text)
+
+        if include_exclusions:
+            return tokens
+
+        return [token for token in tokens if token not in self.word_exclusions]
+
+    def _clean_text(self, text: str) -> str:
+        text = re.sub(r"http\S+", "", text)
+        text = re.sub(r"www\S+", "", text)
+        text = re.sub(r"&\w+;", "", text)
+        text = re.sub(r"\bamp\b", "", text)
+        text = re.sub(r"\S+\.(jpg|jpeg|png|webp|gif)", "", text)
+        return text
+
+    def _content_texts(self, df: pd.DataFrame) -> pd.Series:
+        return df["content"].dropna().astype(str).apply(self._clean_text).str.lower()
+
+    def _valid_ngram(self, tokens: tuple[str, ...]) -> bool:
+        if any(token in self.word_exclusions for token in tokens):
+            return False
+
+        return len(set(tokens)) != 1
+
+    def word_frequencies(self, df: pd.DataFrame, limit: int = 100, tokens=None) -> list[dict]:
+        words = []
+        for text in self._content_texts(df):
+            words.extend(self._tokenize(text))
+
+        counts = Counter(words)
+
+        return (
+            pd.DataFrame(counts.items(), columns=["word", "count"])
+            .sort_values("count", ascending=False)
+            .head(limit)
+            .reset_index(drop=True)
+            .to_dict(orient="records")
+        )
+
+    def ngrams(self, df: pd.DataFrame, n: int = 2, limit: int | None = None, tokens=None) -> list[dict]:
+        all_ngrams = []
+        result_limit = limit or self.ngram_config.max_results
+
+        for text in self._content_texts(df):
+            tokens = self._tokenize(text, include_exclusions=True)
+
+            for index in range(len(tokens) - n + 1):
+                ngram_tokens = tuple(tokens[index : index + n])
+                if self._valid_ngram(ngram_tokens):
+                    all_ngrams.append(" ".join(ngram_tokens))
+
+        filtered_counts = [
+            (ngram, count)
+            for ngram, count in Counter(all_ngrams).items()
+            if count >= self.ngram_config.min_count
+        ]
+
+        if not filtered_counts:
+            return []
+
+        return (
+            pd.DataFrame(filtered_counts, columns=["ngram", "count"])
+            .sort_values(["count", "ngram"], ascending=[False, True])
+            .head(result_limit)
+            .to_dict(orient="records")
+        )
+
+
+def synthetic_content(events: int, vocab_size: int = 20_000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    vocab = np.array(
+        ["".join(rng.choice(letters, rng.integers(3, 10))) for _ in range(vocab_size)]
+        + sorted(exclude_words())
+        + EXTRAS,
+        dtype=object,
+    )
+
+    # Zipf-like word frequencies, so n-grams repeat like in real threads
+    weights = 1 / np.arange(1, len(vocab) + 1)
+    lengths = rng.integers(3, 40, events)
+    words = vocab[rng.choice(len(vocab), int(lengths.sum()), p=weights / weights.sum())]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+
+    content = [" ".join(words[bounds[i] : bounds[i + 1]]) for i in range(events)]
+    content[::50] = [None] * len(content[::50])
+
+    return pd.DataFrame({"content": content})
+
+
+def run(analysis: LinguisticAnalysis, df: pd.DataFrame, tokens=None) -> dict:
+    return {
+        "word_frequencies": analysis.word_frequencies(df, tokens=tokens),
+        "common_two_phrases": analysis.ngrams(df, tokens=tokens),
+        "common_three_phrases": analysis.ngrams(df, n=3, tokens=tokens),
+    }
+
+
+def median_seconds(function, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", default="10000,100000,1000000")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    legacy = LegacyLinguisticAnalysis(exclude_words())
+    engine = LinguisticAnalysis(exclude_words())
+
+    print(f"{'events':>10}{'legacy (s)':>14}{'engine (s)':>14}{'cached tokens (s)':>20}{'speedup':>10}")
+    for events in (int(size) for size in args.events.split(",")):
+        df = synthetic_content(events)
+
+        expected = run(legacy, df)
+        store = TokenStore.from_frame(df)
+        if run(engine, df, store) != expected:
+            raise SystemExit(f"Results differ from the legacy implementation at {events:,} events")
+
+        legacy_s = median_seconds(lambda: run(legacy, df), args.repeats)
+        # One store per run, like StatGen.linguistic
+        engine_s = median_seconds(
+            lambda: run(engine, df, TokenStore.from_frame(df)), args.repeats
+        )
+        cached_s = median_seconds(lambda: run(engine, df, store), args.repeats)
+
+        speedup = legacy_s / max(engine_s, 1e-9)
+        print(f"{events:>10,}{legacy_s:>14.2f}{engine_s:>14.2f}{cached_s:>20.2f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
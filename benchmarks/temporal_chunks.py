@@ -0,0 +1,78 @@
+"""
+Temporal analysis time, streamed in chunks against one loaded frame.
+
+Runs StatGen.temporal_from_chunks over synthetic events split into chunks
+of each size (no database needed), checks that it returns exactly what
+StatGen.temporal returns on the whole frame and reports the time of each.
+Dates, weekdays and hours span chunk boundaries, as they do when
+DatasetManager.iter_dataset_content streams a dataset in id order.
+
+    python -m benchmarks.temporal_chunks --events 100000 --chunk-sizes 100,10000,50000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from server.analysis.stat_gen import StatGen
+
+
+def synthetic_events(events: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+
+    start = pd.Timestamp("2024-01-01").value // 10**9
+    dt = pd.to_datetime(np.sort(rng.integers(start, start + 90 * 24 * 3600, events)), unit="s")
+
+    return pd.DataFrame(
+        {
+            "date": dt.date,
+            "weekday": dt.day_name(),
+            "hour": dt.hour,
+        }
+    )
+
+
+def chunked(df: pd.DataFrame, chunk_size: int) -> list[pd.DataFrame]:
+    return [df.iloc[start : start + chunk_size] for start in range(0, len(df), chunk_size)]
+
+
+def median_seconds(function, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--chunk-sizes", default="100,10000,50000")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    stat_gen = StatGen()
+
+    if stat_gen.temporal_from_chunks([]) != stat_gen.temporal(synthetic_events(0)):
+        raise SystemExit("Results differ for a dataset without events")
+
+    df = synthetic_events(args.events)
+    expected = stat_gen.temporal(df)
+    whole_s = median_seconds(lambda: stat_gen.temporal(df), args.repeats)
+
+    print(f"{'chunk size':>12}{'chunks':>10}{'streamed (s)':>15}{'whole frame (s)':>18}")
+    for chunk_size in (int(size) for size in args.chunk_sizes.split(",")):
+        chunks = chunked(df, chunk_size)
+        if stat_gen.temporal_from_chunks(chunks) != expected:
+            raise SystemExit(f"Results differ from the whole frame at chunk size {chunk_size:,}")
+
+        streamed_s = median_seconds(lambda: stat_gen.temporal_from_chunks(chunks), args.repeats)
+        print(f"{chunk_size:>12,}{len(chunks):>10,}{streamed_s:>15.2f}{whole_s:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
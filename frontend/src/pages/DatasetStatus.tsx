@@ -9,6 +9,7 @@ type DatasetStatusResponse = {
   status?: "fetching" | "processing" | "complete" | "error";
   status_message?: string | null;
   completed_at?: string | null;
+  progress?: number | null;
 };
 
 const styles = StatsStyling;
@@ -20,6 +21,7 @@ const DatasetStatusPage = () => {
   const [status, setStatus] =
     useState<DatasetStatusResponse["status"]>("processing");
   const [statusMessage, setStatusMessage] = useState("");
+  const [progress, setProgress] = useState<number | null>(null);
   const parsedDatasetId = useMemo(() => Number(datasetId), [datasetId]);
 
   useEffect(() => {
@@ -31,24 +33,34 @@ const DatasetStatusPage = () => {
     }
 
     let pollTimer: number | undefined;
+    let finished = false;
+
+    const applyStatus = (data: DatasetStatusResponse) => {
+      const nextStatus = data.status ?? "processing";
+      setStatus(nextStatus);
+      setStatusMessage(String(data.status_message ?? ""));
+      setProgress(typeof data.progress === "number" ? data.progress : null);
+      setLoading(false);
+
+      if (nextStatus === "complete" || nextStatus === "error") {
+        finished = true;
+      }
+
+      if (nextStatus === "complete") {
+        window.setTimeout(() => {
+          navigate(`/dataset/${parsedDatasetId}/stats`, { replace: true });
+        }, 800);
+      }
+    };
 
     const pollStatus = async () => {
       try {
         const response = await axios.get<DatasetStatusResponse>(
           `${API_BASE_URL}/dataset/${parsedDatasetId}/status`,
         );
-
-        const nextStatus = response.data.status ?? "processing";
-        setStatus(nextStatus);
-        setStatusMessage(String(response.data.status_message ?? ""));
-        setLoading(false);
-
-        if (nextStatus === "complete") {
-          window.setTimeout(() => {
-            navigate(`/dataset/${parsedDatasetId}/stats`, { replace: true });
-          }, 800);
-        }
+        applyStatus(response.data);
       } catch (error: unknown) {
+        finished = true;
         setLoading(false);
         setStatus("error");
         if (axios.isAxiosError(error)) {
@@ -62,19 +74,70 @@ const DatasetStatusPage = () => {
       }
     };
 
-    void pollStatus();
-    pollTimer = window.setInterval(() => {
-      if (status !== "complete" && status !== "error") {
+    // Polling is only the fallback for when the event stream can't connect
+    const startPolling = () => {
+      void pollStatus();
+      pollTimer = window.setInterval(() => {
+        if (finished) {
+          window.clearInterval(pollTimer);
+          return;
+        }
         void pollStatus();
+      }, 2000);
+    };
+
+    let source: EventSource | undefined;
+    let cancelled = false;
+
+    const openStream = async () => {
+      let streamToken: string;
+      try {
+        // A short-lived token for this stream only, it ends up in the URL
+        const response = await axios.post<{ stream_token: string }>(
+          `${API_BASE_URL}/dataset/${parsedDatasetId}/status/stream/token`,
+        );
+        streamToken = response.data.stream_token;
+      } catch {
+        if (!cancelled) {
+          startPolling();
+        }
+        return;
       }
-    }, 2000);
+
+      if (cancelled) {
+        return;
+      }
+
+      const stream = new EventSource(
+        `${API_BASE_URL}/dataset/${parsedDatasetId}/status/stream?jwt=${encodeURIComponent(streamToken)}`,
+      );
+      source = stream;
+
+      stream.addEventListener("status", (event) => {
+        applyStatus(JSON.parse((event as MessageEvent<string>).data));
+        if (finished) {
+          stream.close();
+        }
+      });
+
+      stream.onerror = () => {
+        stream.close();
+        if (!finished && pollTimer === undefined) {
+          startPolling();
+        }
+      };
+    };
+
+    void openStream();
 
     return () => {
+      cancelled = true;
+      source?.close();
       if (pollTimer) {
         window.clearInterval(pollTimer);
       }
     };
-  }, [navigate, parsedDatasetId, status]);
+  }, [navigate, parsedDatasetId]);
 
   const isProcessing =
     loading || status === "fetching" || status === "processing";
@@ -116,6 +179,7 @@ const DatasetStatusPage = () => {
               (isProcessing
                 ? "Waiting for updates from the worker queue..."
                 : "No details provided.")}
+            {isProcessing && progress !== null && ` (${Math.round(progress)}%)`}
           </div>
         </div>
       </div>
@@ -322,11 +322,12 @@ const StatPage = () => {
       return allRecords;
     }
 
-    const response = await axios.get<unknown>(
+    const response = await axios.get<string>(
       `${API_BASE_URL}/dataset/${datasetId}/all`,
       {
-        params: appliedFilters,
+        params: { ...appliedFilters, format: "ndjson" },
         headers: authHeaders,
+        responseType: "text",
       },
     );
 
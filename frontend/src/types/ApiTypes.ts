@@ -140,10 +140,41 @@ type ConversationConcentration = {
   single_comment_author_ratio: number;
 };
 
+type AuthorCentrality = {
+  author: string;
+  in_degree: number;
+  out_degree: number;
+  centrality: number;
+};
+
+type AuthorPageRank = {
+  author: string;
+  score: number;
+};
+
+type GraphMetrics = {
+  authors: number;
+  edges: number;
+  reciprocity: number;
+  degree_centrality: AuthorCentrality[];
+  pagerank: AuthorPageRank[];
+};
+
+type GraphReduction = {
+  min_edge_weight?: number;
+  k_core?: number;
+  collapse_below_degree?: number;
+  top_k_edges?: number;
+  authors: number;
+  edges: number;
+};
+
 type InteractionAnalysisResponse = {
   top_interaction_pairs?: [[string, string], number][];
   conversation_concentration?: ConversationConcentration;
   interaction_graph: InteractionGraph;
+  graph_metrics?: GraphMetrics;
+  graph_reduction?: GraphReduction;
 };
 
 // Cultural
@@ -174,6 +205,15 @@ type StanceMarkers = {
   permission_emotion_avg?: Record<string, number>;
 };
 
+// <category>_total, <category>_per_1k_tokens and <category>_emotion_avg
+// for each of a dataset's own lexicon categories
+type LexiconMarkers = Record<string, number | Record<string, number>>;
+
+type DatasetLexicons = {
+  lexicons: Record<string, string[]>;
+  defaults?: Record<string, string[]>;
+};
+
 type EntityEmotionAggregate = {
   post_count: number;
   emotion_avg: Record<string, number>;
@@ -187,6 +227,7 @@ type CulturalAnalysisResponse = {
   identity_markers?: IdentityMarkers;
   stance_markers?: StanceMarkers;
   avg_emotion_per_entity?: AverageEmotionPerEntity;
+  lexicon_markers?: LexiconMarkers;
 };
 
 // Summary
@@ -217,6 +258,10 @@ export type {
   User,
   InteractionGraph,
   ConversationConcentration,
+  AuthorCentrality,
+  AuthorPageRank,
+  GraphMetrics,
+  GraphReduction,
   UserAnalysisResponse,
   UserEndpointResponse,
   FrequencyWord,
@@ -232,6 +277,8 @@ export type {
   InteractionAnalysisResponse,
   IdentityMarkers,
   StanceMarkers,
+  LexiconMarkers,
+  DatasetLexicons,
   EntityEmotionAggregate,
   AverageEmotionPerEntity,
   CulturalAnalysisResponse,
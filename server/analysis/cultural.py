@@ -1,33 +1,45 @@
 import pandas as pd
-import re
 
 from typing import Any
 
+from server.analysis.lexicon import STANCE_CATEGORIES, Lexicon
+from server.analysis.tokens import TokenStore, tokens_for
+
+DEFAULT_LEXICON = Lexicon.from_dict()
+
 
 class CulturalAnalysis:
     def __init__(self, content_col: str = "content", topic_col: str = "topic"):
         self.content_col = content_col
         self.topic_col = topic_col
 
-    def get_identity_markers(self, original_df: pd.DataFrame) -> dict[str, Any]:
-        df = original_df.copy()
-        s = df[self.content_col].fillna("").astype(str).str.lower()
-
+    def _emotion_columns(self, df: pd.DataFrame) -> list[str]:
         emotion_exclusions = {"emotion_neutral", "emotion_surprise"}
-        emotion_cols = [
+        return [
             c
             for c in df.columns
             if c.startswith("emotion_") and c not in emotion_exclusions
         ]
 
-        # Tokenize per row
-        in_pattern = re.compile(r"\b(we|us|our|ourselves)\b")
-        out_pattern = re.compile(r"\b(they|them|their|themselves)\b")
-        token_pattern = re.compile(r"\b[a-z]{2,}\b")
+    def _emotion_avg(self, emo: pd.DataFrame, mask: pd.Series) -> dict:
+        return (
+            emo.loc[mask].mean() if mask.any() else pd.Series(0.0, index=emo.columns)
+        ).to_dict()
 
-        in_hits = s.str.count(in_pattern)
-        out_hits = s.str.count(out_pattern)
-        total_tokens = s.str.count(token_pattern).sum()
+    def get_identity_markers(
+        self,
+        original_df: pd.DataFrame,
+        tokens: TokenStore | None = None,
+        lexicon: Lexicon | None = None,
+    ) -> dict[str, Any]:
+        df = original_df.copy()
+        tokens = tokens_for(original_df, tokens, self.content_col)
+        markers = tokens.marker_counts(lexicon or DEFAULT_LEXICON)
+        emotion_cols = self._emotion_columns(df)
+
+        in_hits = markers["in_group"]
+        out_hits = markers["out_group"]
+        total_tokens = tokens.token_counts("lowered").sum()
 
         in_count = int(in_hits.sum())
         out_count = int(out_hits.sum())
@@ -49,93 +61,53 @@ class CulturalAnalysis:
         if emotion_cols:
             emo = df[emotion_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
 
-            in_avg = (
-                emo.loc[in_mask].mean()
-                if in_mask.any()
-                else pd.Series(0.0, index=emotion_cols)
-            )
-            out_avg = (
-                emo.loc[out_mask].mean()
-                if out_mask.any()
-                else pd.Series(0.0, index=emotion_cols)
-            )
-
-            result["in_group_emotion_avg"] = in_avg.to_dict()
-            result["out_group_emotion_avg"] = out_avg.to_dict()
+            result["in_group_emotion_avg"] = self._emotion_avg(emo, in_mask)
+            result["out_group_emotion_avg"] = self._emotion_avg(emo, out_mask)
 
         return result
 
-    def get_stance_markers(self, df: pd.DataFrame) -> dict[str, Any]:
-        s = df[self.content_col].fillna("").astype(str)
-        emotion_exclusions = {"emotion_neutral", "emotion_surprise"}
-        emotion_cols = [
-            c
-            for c in df.columns
-            if c.startswith("emotion_") and c not in emotion_exclusions
-        ]
-
-        hedge_pattern = re.compile(
-            r"\b(maybe|perhaps|possibly|probably|likely|seems|seem|i think|i feel|i guess|kind of|sort of|somewhat)\b"
-        )
-        certainty_pattern = re.compile(
-            r"\b(definitely|certainly|clearly|obviously|undeniably|always|never)\b"
-        )
-        deontic_pattern = re.compile(
-            r"\b(must|should|need|needs|have to|has to|ought|required|require)\b"
-        )
-        permission_pattern = re.compile(r"\b(can|allowed|okay|ok|permitted)\b")
-
-        hedge_counts = s.str.count(hedge_pattern)
-        certainty_counts = s.str.count(certainty_pattern)
-        deontic_counts = s.str.count(deontic_pattern)
-        perm_counts = s.str.count(permission_pattern)
-
-        token_counts = s.apply(lambda t: len(re.findall(r"\b[a-z]{2,}\b", t))).replace(
-            0, 1
-        )
+    def get_stance_markers(
+        self,
+        df: pd.DataFrame,
+        tokens: TokenStore | None = None,
+        lexicon: Lexicon | None = None,
+    ) -> dict[str, Any]:
+        return self._marker_stats(df, STANCE_CATEGORIES, tokens, lexicon)
 
-        result = {
-            "hedge_total": int(hedge_counts.sum()),
-            "certainty_total": int(certainty_counts.sum()),
-            "deontic_total": int(deontic_counts.sum()),
-            "permission_total": int(perm_counts.sum()),
-            "hedge_per_1k_tokens": round(
-                1000 * hedge_counts.sum() / token_counts.sum(), 3
-            ),
-            "certainty_per_1k_tokens": round(
-                1000 * certainty_counts.sum() / token_counts.sum(), 3
-            ),
-            "deontic_per_1k_tokens": round(
-                1000 * deontic_counts.sum() / token_counts.sum(), 3
-            ),
-            "permission_per_1k_tokens": round(
-                1000 * perm_counts.sum() / token_counts.sum(), 3
-            ),
-        }
+    def get_lexicon_markers(
+        self, df: pd.DataFrame, lexicon: Lexicon, tokens: TokenStore | None = None
+    ) -> dict[str, Any]:
+        """Stance-style statistics of a dataset's own lexicon categories."""
+        return self._marker_stats(df, lexicon.custom_names(), tokens, lexicon)
+
+    def _marker_stats(
+        self,
+        df: pd.DataFrame,
+        categories: list[str],
+        tokens: TokenStore | None = None,
+        lexicon: Lexicon | None = None,
+    ) -> dict[str, Any]:
+        tokens = tokens_for(df, tokens, self.content_col)
+        markers = tokens.marker_counts(lexicon or DEFAULT_LEXICON)
+        emotion_cols = self._emotion_columns(df)
+
+        token_count = tokens.token_counts("lowered").replace(0, 1).sum()
+
+        result = {}
+        for category in categories:
+            result[f"{category}_total"] = int(markers[category].sum())
+        for category in categories:
+            result[f"{category}_per_1k_tokens"] = round(
+                1000 * markers[category].sum() / token_count, 3
+            )
 
         if emotion_cols:
             emo = df[emotion_cols].apply(pd.to_numeric, errors="coerce").fillna(0.0)
 
-            result["hedge_emotion_avg"] = (
-                emo.loc[hedge_counts > 0].mean()
-                if (hedge_counts > 0).any()
-                else pd.Series(0.0, index=emotion_cols)
-            ).to_dict()
-            result["certainty_emotion_avg"] = (
-                emo.loc[certainty_counts > 0].mean()
-                if (certainty_counts > 0).any()
-                else pd.Series(0.0, index=emotion_cols)
-            ).to_dict()
-            result["deontic_emotion_avg"] = (
-                emo.loc[deontic_counts > 0].mean()
-                if (deontic_counts > 0).any()
-                else pd.Series(0.0, index=emotion_cols)
-            ).to_dict()
-            result["permission_emotion_avg"] = (
-                emo.loc[perm_counts > 0].mean()
-                if (perm_counts > 0).any()
-                else pd.Series(0.0, index=emotion_cols)
-            ).to_dict()
+            for category in categories:
+                result[f"{category}_emotion_avg"] = self._emotion_avg(
+                    emo, markers[category] > 0
+                )
 
         return result
 
@@ -1,13 +1,22 @@
 import pandas as pd
 
+from typing import Callable
+
 from server.analysis.nlp import NLP
+from server.core.datasets import event_fingerprints
 
 
 class DatasetEnrichment:
-    def __init__(self, df: pd.DataFrame, topics: dict):
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        topics: dict,
+        existing_events: pd.DataFrame | None = None,
+    ):
         self.df = self._explode_comments(df)
+        if existing_events is not None:
+            self.df = self._drop_unchanged(self.df, existing_events)
         self.topics = topics
-        self.nlp = NLP(self.df, "title", "content", self.topics)
 
     def _explode_comments(self, df) -> pd.DataFrame:
         comments_df = df[["id", "comments"]].explode("comments")
@@ -28,15 +37,64 @@ class DatasetEnrichment:
 
         return df
 
-    def enrich(self) -> pd.DataFrame:
+    def _drop_unchanged(
+        self, df: pd.DataFrame, existing_events: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Keep only events that are new or whose title/content changed, as
+        judged against DatasetManager.get_event_fingerprints. Everything
+        else is already enriched and stored.
+        """
+        if existing_events.empty or df.empty:
+            return df
+
+        # Stored keys come back as text, connectors may give ids as ints
+        incoming = pd.MultiIndex.from_arrays(
+            [
+                df["id"].astype(str),
+                df["type"].astype(str),
+                df["source"].astype(str),
+                event_fingerprints(df),
+            ]
+        )
+        stored = pd.MultiIndex.from_arrays(
+            [
+                existing_events["post_id"].astype(str),
+                existing_events["type"].astype(str),
+                existing_events["source"].astype(str),
+                existing_events["fingerprint"],
+            ]
+        )
+
+        return df[~incoming.isin(stored)].reset_index(drop=True)
+
+    def enrich(
+        self, progress: Callable[[float, str], None] | None = None
+    ) -> pd.DataFrame:
+        """
+        Add the time and NLP columns. progress, if given, is called with the
+        fraction done (0-1) and a description as each stage finishes.
+        """
+        report = progress or (lambda fraction, message: None)
+
+        # Nothing new to process, skip loading the NLP models
+        if self.df.empty:
+            report(1.0, "No new events to process")
+            return self.df
+
         self.df["timestamp"] = pd.to_numeric(self.df["timestamp"], errors="raise")
         self.df["date"] = pd.to_datetime(self.df["timestamp"], unit="s").dt.date
         self.df["dt"] = pd.to_datetime(self.df["timestamp"], unit="s", utc=True)
         self.df["hour"] = self.df["dt"].dt.hour
         self.df["weekday"] = self.df["dt"].dt.day_name()
 
+        self.nlp = NLP(self.df, "title", "content", self.topics)
+        report(0.1, "Models loaded")
         self.nlp.add_emotion_cols()
+        report(0.5, "Emotion classification done")
         self.nlp.add_topic_col()
+        report(0.7, "Topic classification done")
         self.nlp.add_ner_cols()
+        report(1.0, "Named entity recognition done")
 
         return self.df
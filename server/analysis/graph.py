@@ -0,0 +1,233 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-6
+PAGERANK_MAX_ITERATIONS = 100
+
+# Node standing in for the authors merged by collapse_below_degree. Square
+# brackets can't appear in a username of any supported source.
+COLLAPSED_AUTHORS = "[other authors]"
+
+
+@dataclass(frozen=True)
+class GraphReduction:
+    """
+    Reduction of a reply graph for rendering, applied in field order:
+
+        min_edge_weight        drop edges with fewer replies
+        k_core                 keep the k-core, authors linked to at least
+                               k others within what remains
+        collapse_below_degree  merge authors linked to fewer others into
+                               one COLLAPSED_AUTHORS node
+        top_k_edges            keep the heaviest edges
+
+    Authors left without edges are dropped.
+    """
+
+    min_edge_weight: int | None = None
+    k_core: int | None = None
+    collapse_below_degree: int | None = None
+    top_k_edges: int | None = None
+
+
+def _degrees(sources: np.ndarray, targets: np.ndarray, node_count: int) -> np.ndarray:
+    # Edges are distinct, so this counts distinct neighbours in and out
+    return np.bincount(sources, minlength=node_count) + np.bincount(
+        targets, minlength=node_count
+    )
+
+
+@dataclass(frozen=True)
+class ReplyGraph:
+    """
+    Directed, weighted graph of who replied to whom, as CSR adjacency over
+    integer author ids. authors holds every author in order of first
+    appearance. The edges of author i are indices[indptr[i]:indptr[i + 1]],
+    each replied to weights[k] times, in order of first reply.
+    """
+
+    authors: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "ReplyGraph":
+        authors = pd.unique(df["author"].dropna())
+
+        # reply_to refers to the comment id, last event wins for duplicates
+        post_authors = df.drop_duplicates("post_id", keep="last").set_index("post_id")["author"]
+
+        replies = df[df["author"].notna() & df["reply_to"].notna() & (df["reply_to"] != "")]
+        targets = replies["reply_to"].map(post_authors)
+
+        linked = targets.notna() & (replies["author"] != targets)
+        index = pd.Index(authors)
+        sources = index.get_indexer(replies["author"][linked])
+        targets = index.get_indexer(targets[linked])
+
+        # Distinct edges in order of first reply, with their reply counts
+        edge_codes, edges = pd.factorize(sources.astype(np.int64) * len(authors) + targets)
+        weights = np.bincount(edge_codes, minlength=len(edges))
+        sources, targets = np.divmod(edges.astype(np.int64), max(len(authors), 1))
+
+        return cls.from_edges(authors, sources, targets, weights)
+
+    @classmethod
+    def from_edges(
+        cls,
+        authors: np.ndarray,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: np.ndarray,
+    ) -> "ReplyGraph":
+        """Graph of distinct edges, kept in the given order per source."""
+        order = np.argsort(sources, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(sources, minlength=len(authors)))])
+
+        return cls(
+            authors=np.asarray(authors, dtype=object),
+            indptr=indptr,
+            indices=targets[order],
+            weights=weights[order],
+        )
+
+    @property
+    def node_count(self) -> int:
+        return len(self.authors)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def sources(self) -> np.ndarray:
+        """Source author id of every edge."""
+        return np.repeat(np.arange(self.node_count), np.diff(self.indptr))
+
+    def to_dict(self) -> dict[str, dict[str, int]]:
+        targets = self.authors[self.indices]
+        weights = self.weights.tolist()
+
+        return {
+            author: dict(zip(targets[start:end], weights[start:end]))
+            for author, start, end in zip(self.authors, self.indptr[:-1], self.indptr[1:])
+        }
+
+    def reduce(self, reduction: GraphReduction) -> "ReplyGraph":
+        authors = self.authors
+        sources, targets, weights = self.sources(), self.indices, self.weights
+
+        if reduction.min_edge_weight:
+            keep = weights >= reduction.min_edge_weight
+            sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+        if reduction.k_core:
+            # Peel authors below k until every remaining one has k links
+            while True:
+                core = _degrees(sources, targets, len(authors)) >= reduction.k_core
+                keep = core[sources] & core[targets]
+                if keep.all():
+                    break
+                sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+        if reduction.collapse_below_degree:
+            minor = _degrees(sources, targets, len(authors)) < reduction.collapse_below_degree
+            collapsed = len(authors)
+            authors = np.append(authors, COLLAPSED_AUTHORS)
+
+            sources = np.where(minor[sources], collapsed, sources)
+            targets = np.where(minor[targets], collapsed, targets)
+
+            # Replies among collapsed authors vanish, the rest are merged
+            # into one edge per pair in order of first appearance
+            keep = sources != targets
+            edge_codes, edges = pd.factorize(
+                sources[keep] * len(authors) + targets[keep]
+            )
+            weights = np.bincount(
+                edge_codes, weights=weights[keep], minlength=len(edges)
+            ).astype(np.int64)
+            sources, targets = np.divmod(edges.astype(np.int64), len(authors))
+
+        if reduction.top_k_edges and len(weights) > reduction.top_k_edges:
+            heaviest = np.argsort(-weights, kind="stable")[: reduction.top_k_edges]
+            keep = np.sort(heaviest)
+            sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+        # Renumber the authors still linked, in their original order
+        linked = np.zeros(len(authors), dtype=bool)
+        linked[sources] = True
+        linked[targets] = True
+        new_ids = np.cumsum(linked) - 1
+
+        return ReplyGraph.from_edges(
+            authors[linked], new_ids[sources], new_ids[targets], weights
+        )
+
+    def top_edges(self, top_n: int) -> list[tuple[tuple[str, str], int]]:
+        """Heaviest edges, ties in adjacency order."""
+        order = np.argsort(-self.weights, kind="stable")[:top_n]
+        sources = self.sources()[order]
+
+        return [
+            ((self.authors[source], self.authors[target]), int(weight))
+            for source, target, weight in zip(sources, self.indices[order], self.weights[order])
+        ]
+
+    def out_degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def in_degrees(self) -> np.ndarray:
+        return np.bincount(self.indices, minlength=self.node_count)
+
+    def degree_centrality(self) -> np.ndarray:
+        """Distinct authors replied to or replied by, over all other authors."""
+        degrees = self.out_degrees() + self.in_degrees()
+        return degrees / max(self.node_count - 1, 1)
+
+    def reciprocity(self) -> float:
+        """Share of edges whose reverse edge also exists."""
+        if self.edge_count == 0:
+            return 0.0
+
+        sources = self.sources()
+        edges = sources * self.node_count + self.indices
+        reverse = self.indices * self.node_count + sources
+
+        return float(np.isin(reverse, edges).mean())
+
+    def pagerank(
+        self,
+        damping: float = PAGERANK_DAMPING,
+        tolerance: float = PAGERANK_TOLERANCE,
+        max_iterations: int = PAGERANK_MAX_ITERATIONS,
+    ) -> np.ndarray:
+        """
+        Weighted PageRank by power iteration. Authors who never replied
+        spread their rank evenly over everyone.
+        """
+        n = self.node_count
+        if n == 0:
+            return np.zeros(0)
+
+        sources = self.sources()
+        out_weight = np.bincount(sources, weights=self.weights, minlength=n)
+        dangling = out_weight == 0
+        edge_share = self.weights / np.where(dangling, 1, out_weight)[sources]
+
+        rank = np.full(n, 1 / n)
+        for _ in range(max_iterations):
+            spread = np.bincount(
+                self.indices, weights=rank[sources] * edge_share, minlength=n
+            )
+            updated = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+
+            converged = np.abs(updated - rank).sum() < n * tolerance
+            rank = updated
+            if converged:
+                break
+
+        return rank
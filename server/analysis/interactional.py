@@ -1,46 +1,61 @@
+import numpy as np
 import pandas as pd
-import re
+
+from server.analysis.graph import ReplyGraph
 
 
 class InteractionAnalysis:
     def __init__(self, word_exclusions: set[str]):
         self.word_exclusions = word_exclusions
 
-    def _tokenize(self, text: str):
-        tokens = re.findall(r"\b[a-z]{3,}\b", text)
-        return [t for t in tokens if t not in self.word_exclusions]
-
-    def interaction_graph(self, df: pd.DataFrame):
-        interactions = {a: {} for a in df["author"].dropna().unique()}
-
-        # reply_to refers to the comment id, this allows us to map comment/post ids to usernames
-        id_to_author = df.set_index("post_id")["author"].to_dict()
-
-        for _, row in df.iterrows():
-            a = row["author"]
-            reply_id = row["reply_to"]
+    def reply_graph(self, df: pd.DataFrame) -> ReplyGraph:
+        return ReplyGraph.from_frame(df)
 
-            if pd.isna(a) or pd.isna(reply_id) or reply_id == "":
-                continue
+    def interaction_graph(self, df: pd.DataFrame, graph: ReplyGraph | None = None):
+        if graph is None:
+            graph = self.reply_graph(df)
+        return graph.to_dict()
 
-            b = id_to_author.get(reply_id)
-            if b is None or a == b:
-                continue
+    def top_interaction_pairs(
+        self, df: pd.DataFrame, top_n=10, graph: ReplyGraph | None = None
+    ):
+        if graph is None:
+            graph = self.reply_graph(df)
+        return graph.top_edges(top_n)
 
-            interactions[a][b] = interactions[a].get(b, 0) + 1
+    def graph_metrics(
+        self, df: pd.DataFrame, top_n: int = 100, graph: ReplyGraph | None = None
+    ) -> dict:
+        if graph is None:
+            graph = self.reply_graph(df)
 
-        return interactions
+        in_degrees = graph.in_degrees()
+        out_degrees = graph.out_degrees()
+        centrality = graph.degree_centrality()
+        pagerank = graph.pagerank()
 
-    def top_interaction_pairs(self, df: pd.DataFrame, top_n=10):
-        graph = self.interaction_graph(df)
-        pairs = []
+        # Authors sorted by score, ties in order of first appearance
+        by_centrality = np.argsort(-centrality, kind="stable")[:top_n]
+        by_pagerank = np.argsort(-pagerank, kind="stable")[:top_n]
 
-        for a, targets in graph.items():
-            for b, count in targets.items():
-                pairs.append(((a, b), count))
-
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        return pairs[:top_n]
+        return {
+            "authors": graph.node_count,
+            "edges": graph.edge_count,
+            "reciprocity": round(graph.reciprocity(), 4),
+            "degree_centrality": [
+                {
+                    "author": graph.authors[i],
+                    "in_degree": int(in_degrees[i]),
+                    "out_degree": int(out_degrees[i]),
+                    "centrality": round(float(centrality[i]), 4),
+                }
+                for i in by_centrality
+            ],
+            "pagerank": [
+                {"author": graph.authors[i], "score": round(float(pagerank[i]), 6)}
+                for i in by_pagerank
+            ],
+        }
 
     def conversation_concentration(self, df: pd.DataFrame) -> dict:
         if "type" not in df.columns:
@@ -0,0 +1,204 @@
+import json
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+# Compiled matchers kept per process, one per distinct lexicon
+lexicon_cache_size = int(os.getenv("LEXICON_CACHE_SIZE", 32))
+
+MAX_LEXICON_PHRASES = 2000
+MAX_PHRASE_LENGTH = 100
+
+# A category is a word, a phrase is words separated by single spaces
+CATEGORY_PATTERN = re.compile(r"^\w+$")
+PHRASE_PATTERN = re.compile(r"^\w+( \w+)*$")
+
+MARKER_LEXICON = {
+    "in_group": ["we", "us", "our", "ourselves"],
+    "out_group": ["they", "them", "their", "themselves"],
+    "hedge": [
+        "maybe", "perhaps", "possibly", "probably", "likely", "seems", "seem",
+        "i think", "i feel", "i guess", "kind of", "sort of", "somewhat",
+    ],
+    "certainty": [
+        "definitely", "certainly", "clearly", "obviously", "undeniably", "always", "never",
+    ],
+    "deontic": [
+        "must", "should", "need", "needs", "have to", "has to", "ought", "required", "require",
+    ],
+    "permission": ["can", "allowed", "okay", "ok", "permitted"],
+}
+
+STANCE_CATEGORIES = ["hedge", "certainty", "deontic", "permission"]
+
+
+def _normalize_phrase(phrase) -> str:
+    if not isinstance(phrase, str):
+        raise ValueError("Lexicon phrases must be strings")
+
+    normalized = " ".join(phrase.lower().split())
+    if not PHRASE_PATTERN.match(normalized) or len(normalized) > MAX_PHRASE_LENGTH:
+        raise ValueError(f"Invalid lexicon phrase: {phrase!r}")
+
+    return normalized
+
+
+@dataclass(frozen=True)
+class Lexicon:
+    """
+    Marker phrases by category, lowercased, as a hashable value so compiled
+    matchers and counts can be cached by it.
+    """
+
+    categories: tuple[tuple[str, tuple[str, ...]], ...]
+
+    @classmethod
+    def from_dict(cls, lexicons: dict | None = None) -> "Lexicon":
+        """
+        MARKER_LEXICON with a dataset's own categories, which replace the
+        built-in category of the same name. A phrase may only belong to one
+        category. Raises ValueError on malformed input.
+        """
+        lexicons = lexicons or {}
+        if not isinstance(lexicons, dict):
+            raise ValueError("Lexicons must map categories to lists of phrases")
+
+        categories = {}
+        for category, phrases in {**MARKER_LEXICON, **lexicons}.items():
+            if not isinstance(category, str) or not CATEGORY_PATTERN.match(category):
+                raise ValueError(f"Invalid lexicon category: {category!r}")
+            if not isinstance(phrases, list):
+                raise ValueError(f"Phrases of {category} must be a list")
+
+            categories[category] = tuple(dict.fromkeys(map(_normalize_phrase, phrases)))
+
+        owners = {}
+        for category, phrases in categories.items():
+            for phrase in phrases:
+                if phrase in owners:
+                    raise ValueError(
+                        f"Phrase {phrase!r} is in both {owners[phrase]} and {category}"
+                    )
+                owners[phrase] = category
+
+        if len(owners) > MAX_LEXICON_PHRASES:
+            raise ValueError(f"Lexicons are limited to {MAX_LEXICON_PHRASES} phrases")
+
+        return cls(tuple(categories.items()))
+
+    @property
+    def names(self) -> list[str]:
+        return [category for category, _ in self.categories]
+
+    def custom_names(self) -> list[str]:
+        """Categories not in MARKER_LEXICON."""
+        return [category for category in self.names if category not in MARKER_LEXICON]
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def pattern(node: dict) -> str:
+        branches = [
+            re.escape(char) + pattern(child) for char, child in node.items() if char
+        ]
+        if not branches:
+            return ""
+
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy, so the longest phrase ending on a word boundary wins
+        return f"(?:{body})?" if "" in node else body
+
+    return pattern(trie)
+
+
+def _scan_groups(categories: tuple[tuple[str, tuple[str, ...]], ...]) -> list[list[int]]:
+    # Matches of two phrases can only overlap if the phrases share a word,
+    # so categories sharing no word are scanned together without taking
+    # matches from each other. Others go to a group of their own.
+    groups: list[tuple[list[int], set[str]]] = []
+
+    for index, (_, phrases) in enumerate(categories):
+        words = {word for phrase in phrases for word in phrase.split()}
+
+        for members, group_words in groups:
+            if group_words.isdisjoint(words):
+                members.append(index)
+                group_words |= words
+                break
+        else:
+            groups.append(([index], words))
+
+    return [members for members, _ in groups]
+
+
+class LexiconMatcher:
+    """
+    The phrases of a lexicon compiled into regexes, each a character trie
+    anchored on word boundaries. Each position only tries the branch of its
+    next character. Categories are counted independently, those that share
+    no word with each other are matched in one scan, so the built-in lexicon
+    takes a single scan per text. Within a category, matches don't overlap
+    and the longest phrase at the leftmost position wins.
+    """
+
+    def __init__(self, lexicon: Lexicon):
+        self.names = lexicon.names
+        self.scans = []
+
+        for members in _scan_groups(lexicon.categories):
+            phrases = [phrase for index in members for phrase in lexicon.categories[index][1]]
+            if not phrases:
+                continue
+
+            columns = np.array(
+                [index for index in members for _ in lexicon.categories[index][1]],
+                dtype=np.int64,
+            )
+            pattern = re.compile(rf"\b{_trie_pattern(phrases)}\b")
+            self.scans.append((pattern, pd.Index(phrases), columns))
+
+    def counts(self, texts: pd.Series) -> pd.DataFrame:
+        """Matches of each category in each lowercased text."""
+        width = len(self.names)
+        counts = np.zeros(len(texts) * width, dtype=np.int64)
+
+        for pattern, phrases, columns in self.scans:
+            findall = pattern.findall
+            matches = [findall(text) for text in texts]
+
+            lengths = np.fromiter(map(len, matches), dtype=np.int64, count=len(matches))
+            rows = np.repeat(np.arange(len(matches)), lengths)
+            categories = columns[phrases.get_indexer(list(chain.from_iterable(matches)))]
+
+            counts += np.bincount(rows * width + categories, minlength=len(counts))
+
+        return pd.DataFrame(
+            counts.reshape(len(texts), width), index=texts.index, columns=self.names
+        )
+
+
+@lru_cache(maxsize=lexicon_cache_size)
+def compile_lexicon(lexicon: Lexicon) -> LexiconMatcher:
+    return LexiconMatcher(lexicon)
+
+
+@lru_cache(maxsize=lexicon_cache_size)
+def _lexicon_from_json(serialized: str) -> Lexicon:
+    return Lexicon.from_dict(json.loads(serialized))
+
+
+def lexicon_for(lexicons: dict | None) -> Lexicon:
+    """Lexicon.from_dict of a dataset's stored lexicons, memoised on their JSON."""
+    return _lexicon_from_json(json.dumps(lexicons or {}))
@@ -0,0 +1,93 @@
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from server.analysis.tokens import EncodedTokens
+
+# Windows of vocabulary ids are packed into one int64 key while they fit
+MAX_PACKED_KEY = 2**63 - 1
+
+
+def word_counts(encoded: EncodedTokens, exclusions: Iterable[str]) -> pd.DataFrame:
+    """
+    Occurrences of every token not in exclusions, in order of first
+    appearance, as word and count columns.
+    """
+    kept = ~encoded.excluded(exclusions)
+    counts = np.bincount(encoded.codes, minlength=len(encoded.vocab))
+
+    return pd.DataFrame({"word": encoded.vocab[kept], "count": counts[kept]})
+
+
+def _count_windows(
+    codes: np.ndarray, starts: np.ndarray, n: int, vocab_size: int, min_count: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Distinct windows of n ids seen at least min_count times, one row of
+    # vocabulary ids each, and how often each occurs. Windows are packed
+    # into one integer key while they fit and counted as runs of the sorted
+    # keys, without materialising a row per window.
+    shape = (vocab_size,) * n
+
+    if vocab_size**n > MAX_PACKED_KEY:
+        windows = np.stack([codes[starts + offset] for offset in range(n)], axis=1)
+        rows, counts = np.unique(windows, axis=0, return_counts=True)
+        frequent = counts >= min_count
+        return rows[frequent], counts[frequent]
+
+    keys = codes[starts]
+    for offset in range(1, n):
+        keys *= vocab_size
+        keys += codes[starts + offset]
+    keys.sort()
+
+    run_starts = np.flatnonzero(np.diff(keys, prepend=-1))
+    counts = np.diff(run_starts, append=len(keys))
+
+    frequent = counts >= min_count
+    rows = np.stack(np.unravel_index(keys[run_starts[frequent]], shape), axis=1)
+
+    return rows, counts[frequent]
+
+
+def ngram_candidates(
+    encoded: EncodedTokens,
+    n: int,
+    exclusions: Iterable[str],
+    min_count: int,
+    limit: int,
+) -> pd.DataFrame:
+    """
+    n-grams of consecutive tokens within an event, as ngram and count
+    columns. N-grams holding an excluded token or repeating a single token
+    are skipped, as are those seen fewer than min_count times.
+
+    Unordered, and only guaranteed to hold the limit most frequent n-grams
+    (plus any tied with the last of them), so callers sort and cut it.
+    """
+    codes = encoded.codes
+    events = encoded.events()
+
+    # Windows that start and end in the same event, events are contiguous
+    starts = np.flatnonzero(events[: max(len(events) - n + 1, 0)] == events[n - 1 :])
+    del events
+
+    excluded = encoded.excluded(exclusions)[codes]
+    valid = ~excluded[starts]
+    repeated = np.ones(len(starts), dtype=bool)
+
+    for offset in range(1, n):
+        valid &= ~excluded[starts + offset]
+        repeated &= codes[starts + offset] == codes[starts]
+
+    starts = starts[valid & ~repeated]
+    rows, counts = _count_windows(codes, starts, n, len(encoded.vocab), min_count)
+
+    # Partial sort, keep whatever can still make the top limit
+    if 0 < limit < len(counts):
+        threshold = np.partition(counts, len(counts) - limit)[len(counts) - limit]
+        top = counts >= threshold
+        rows, counts = rows[top], counts[top]
+
+    ngrams = [" ".join(tokens) for tokens in encoded.vocab[rows]]
+    return pd.DataFrame({"ngram": ngrams, "count": counts})
@@ -1,15 +1,21 @@
-import nltk
-import json
 import pandas as pd
-from nltk.corpus import stopwords
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
 
 from server.analysis.cultural import CulturalAnalysis
 from server.analysis.emotional import EmotionalAnalysis
+from server.analysis.graph import GraphReduction
 from server.analysis.interactional import InteractionAnalysis
+from server.analysis.lexicon import lexicon_for
 from server.analysis.linguistic import LinguisticAnalysis
 from server.analysis.summary import SummaryAnalysis
 from server.analysis.temporal import TemporalAnalysis
+from server.analysis.tokens import TokenStore, TokenStoreCache, tokens_for
 from server.analysis.user import UserAnalysis
+from server.core.datasets import DatasetManager
+from server.core.filters import EXCLUDED_AUTHORS, normalize_filters
 
 DOMAIN_STOPWORDS = {
     "www",
@@ -28,24 +34,67 @@ DOMAIN_STOPWORDS = {
     "one",
 }
 
-EXCLUDED_AUTHORS = {"[deleted]", "automoderator"}
+# NLTK's English stopword list, bundled so startup never touches the network
+STOPWORDS_FILE = Path(__file__).parent / "english_stopwords.txt"
+
+
+@lru_cache(maxsize=None)
+def exclude_words() -> frozenset[str]:
+    stopwords = STOPWORDS_FILE.read_text().split()
+    return frozenset(stopwords) | DOMAIN_STOPWORDS
+
+
+# Analyses served per dataset, in dashboard order. Those with a
+# <name>_from_chunks variant are computed over streamed chunks.
+ANALYSES = [
+    "summary",
+    "temporal",
+    "linguistic",
+    "emotional",
+    "user",
+    "interactional",
+    "cultural",
+]
+
+EMOTION_COLUMNS = [
+    "emotion_anger",
+    "emotion_disgust",
+    "emotion_fear",
+    "emotion_joy",
+    "emotion_sadness",
+]
+
+
+def requires_columns(*columns: str):
+    """
+    Declare the event columns a StatGen method reads, so the dataset loader
+    can fetch only that projection.
+    """
 
-nltk.download("stopwords")
-EXCLUDE_WORDS = set(stopwords.words("english")) | DOMAIN_STOPWORDS
+    def decorator(method):
+        method.required_columns = list(columns)
+        return method
+
+    return decorator
 
 
 class StatGen:
     def __init__(self) -> None:
         self.temporal_analysis = TemporalAnalysis()
         self.emotional_analysis = EmotionalAnalysis()
-        self.interaction_analysis = InteractionAnalysis(EXCLUDE_WORDS)
-        self.linguistic_analysis = LinguisticAnalysis(EXCLUDE_WORDS)
+        self.interaction_analysis = InteractionAnalysis(exclude_words())
+        self.linguistic_analysis = LinguisticAnalysis(exclude_words())
         self.cultural_analysis = CulturalAnalysis()
         self.summary_analysis = SummaryAnalysis()
-        self.user_analysis = UserAnalysis(EXCLUDE_WORDS)
+        self.user_analysis = UserAnalysis(exclude_words())
+        self.token_stores = TokenStoreCache()
 
     ## Private Methods
     def _prepare_filtered_df(self, df: pd.DataFrame, filters: dict | None = None) -> pd.DataFrame:
+        # Already filtered in SQL by DatasetManager.get_dataset_content
+        if df.attrs.get("prefiltered"):
+            return df
+
         filters = filters or {}
         filtered_df = df.copy()
 
@@ -84,16 +133,137 @@ class StatGen:
 
         return filtered_df
 
-    def _json_ready_records(self, df: pd.DataFrame) -> list[dict]:
-        return json.loads(
-            df.to_json(orient="records", date_format="iso", date_unit="s")
+    ## Public Methods
+    def required_columns(self, analysis: str) -> list[str] | None:
+        """Columns needed by an analysis method, or None for every column."""
+        return getattr(getattr(self, analysis), "required_columns", None)
+
+    def columns_for(self, analyses: Iterable[str]) -> list[str] | None:
+        """Union of the columns several analyses read, in first-use order."""
+        columns = []
+
+        for analysis in analyses:
+            required = self.required_columns(analysis)
+            if required is None:
+                return None
+
+            columns.extend(column for column in required if column not in columns)
+
+        return columns
+
+    def token_store(
+        self,
+        df: pd.DataFrame,
+        dataset_manager: DatasetManager | None = None,
+        dataset_id: int | None = None,
+        filters: dict | None = None,
+    ) -> TokenStore:
+        """
+        Tokens of the events' content. Those of a complete dataset are kept
+        per content version and filters, so every analysis and request over
+        the same events shares one tokenisation.
+        """
+        stamp = None
+        if dataset_manager is not None and dataset_id is not None:
+            stamp = dataset_manager.get_content_stamp(dataset_id)
+
+        if stamp is None:
+            return TokenStore.from_frame(df)
+
+        key = (dataset_id, stamp["version"], stamp["completed_at"], normalize_filters(filters))
+        return self.token_stores.get(key, df)
+
+    def dataset_options(
+        self, analysis: str, dataset_manager: DatasetManager, dataset_id: int
+    ) -> dict:
+        """Options a dataset's own settings add to an analysis, see analyse."""
+        if analysis == "cultural":
+            lexicons = dataset_manager.get_dataset_lexicons(dataset_id)
+            if lexicons:
+                return {"lexicons": lexicons}
+
+        return {}
+
+    def analyse(
+        self,
+        analysis: str,
+        df: pd.DataFrame,
+        filters: dict | None = None,
+        dataset_id: int | None = None,
+        dataset_manager: DatasetManager | None = None,
+        options: dict | None = None,
+    ) -> dict:
+        """
+        Run one analysis on loaded events, reusing the content's tokens.
+        options are passed on to the analysis as keyword arguments.
+        """
+        method = getattr(self, analysis)
+        columns = self.required_columns(analysis) or df.columns
+        options = options or {}
+
+        if "content" not in columns:
+            return method(df, filters, dataset_id=dataset_id, **options)
+
+        tokens = self.token_store(df, dataset_manager, dataset_id, filters)
+        return method(df, filters, dataset_id=dataset_id, tokens=tokens, **options)
+
+    def run(
+        self,
+        analysis: str,
+        dataset_manager: DatasetManager,
+        dataset_id: int,
+        filters: dict | None = None,
+        options: dict | None = None,
+    ) -> dict:
+        """Load a dataset's events with filters applied and run one analysis."""
+        if analysis not in ANALYSES:
+            raise ValueError(f"Unknown analysis: {analysis}")
+
+        streamed = getattr(self, f"{analysis}_from_chunks", None)
+        if streamed is not None:
+            chunks = dataset_manager.iter_dataset_content(
+                dataset_id, filters, columns=streamed.required_columns
+            )
+            return streamed(chunks, filters, dataset_id=dataset_id)
+
+        df = dataset_manager.get_dataset_content(
+            dataset_id, filters, columns=self.required_columns(analysis)
         )
+        return self.analyse(analysis, df, filters, dataset_id, dataset_manager, options)
 
-    ## Public Methods
-    def filter_dataset(self, df: pd.DataFrame, filters: dict | None = None) -> list[dict]:
-        filtered_df = self._prepare_filtered_df(df, filters)
-        return self._json_ready_records(filtered_df)
+    @requires_columns("date", "weekday", "hour")
+    def temporal_from_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        filters: dict | None = None,
+        dataset_id: int | None = None,
+    ) -> dict:
+        day_parts = []
+        weekday_hour_parts = []
+
+        for chunk in chunks:
+            filtered_chunk = self._prepare_filtered_df(chunk, filters)
+            day_parts.append(self.temporal_analysis.day_counts(filtered_chunk))
+            weekday_hour_parts.append(
+                self.temporal_analysis.weekday_hour_counts(filtered_chunk)
+            )
+
+        # No chunks at all, the same empty result temporal() gives
+        if not day_parts:
+            return {"events_per_day": [], "weekday_hour_heatmap": []}
+
+        # A date, or weekday and hour, can span chunks, so counts are summed
+        day_counts = pd.concat(day_parts).groupby(level=0).sum()
+        weekday_hour_counts = pd.concat(weekday_hour_parts).groupby(level=[0, 1]).sum()
 
+        return {
+            "events_per_day": self.temporal_analysis.posts_per_day_from_counts(day_counts),
+            "weekday_hour_heatmap": self.temporal_analysis.heatmap_from_counts(
+                weekday_hour_counts
+            ),
+        }
+
+    @requires_columns("date", "weekday", "hour")
     def temporal(
         self,
         df: pd.DataFrame,
@@ -107,21 +277,25 @@ class StatGen:
             "weekday_hour_heatmap": self.temporal_analysis.heatmap(filtered_df),
         }
 
+    @requires_columns("content")
     def linguistic(
         self,
         df: pd.DataFrame,
         filters: dict | None = None,
         dataset_id: int | None = None,
+        tokens: TokenStore | None = None,
     ) -> dict:
         filtered_df = self._prepare_filtered_df(df, filters)
+        tokens = tokens_for(filtered_df, tokens)
 
         return {
-            "word_frequencies": self.linguistic_analysis.word_frequencies(filtered_df),
-            "common_two_phrases": self.linguistic_analysis.ngrams(filtered_df),
-            "common_three_phrases": self.linguistic_analysis.ngrams(filtered_df, n=3),
-            "lexical_diversity": self.linguistic_analysis.lexical_diversity(filtered_df)
+            "word_frequencies": self.linguistic_analysis.word_frequencies(filtered_df, tokens=tokens),
+            "common_two_phrases": self.linguistic_analysis.ngrams(filtered_df, tokens=tokens),
+            "common_three_phrases": self.linguistic_analysis.ngrams(filtered_df, n=3, tokens=tokens),
+            "lexical_diversity": self.linguistic_analysis.lexical_diversity(filtered_df, tokens=tokens)
         }
 
+    @requires_columns("topic", "source", *EMOTION_COLUMNS)
     def emotional(
         self,
         df: pd.DataFrame,
@@ -137,47 +311,94 @@ class StatGen:
             "emotion_by_source": self.emotional_analysis.emotion_by_source(filtered_df)
         }
 
+    @requires_columns("author", "source", "type", "topic", "content", *EMOTION_COLUMNS)
     def user(
         self,
         df: pd.DataFrame,
         filters: dict | None = None,
         dataset_id: int | None = None,
+        tokens: TokenStore | None = None,
     ) -> dict:
         filtered_df = self._prepare_filtered_df(df, filters)
 
         return {
             "top_users": self.user_analysis.top_users(filtered_df),
-            "users": self.user_analysis.per_user_analysis(filtered_df)
+            "users": self.user_analysis.per_user_analysis(filtered_df, tokens=tokens)
         }
 
+    @requires_columns("author", "post_id", "reply_to", "type")
     def interactional(
         self,
         df: pd.DataFrame,
         filters: dict | None = None,
         dataset_id: int | None = None,
+        graph_reduction: dict | None = None,
     ) -> dict:
+        """
+        graph_reduction (GraphReduction fields) only shrinks the returned
+        interaction_graph, pairs and metrics cover the whole graph.
+        """
         filtered_df = self._prepare_filtered_df(df, filters)
+        graph = self.interaction_analysis.reply_graph(filtered_df)
 
-        return {
-            "top_interaction_pairs": self.interaction_analysis.top_interaction_pairs(filtered_df, top_n=100),
-            "interaction_graph": self.interaction_analysis.interaction_graph(filtered_df),
+        result = {
+            "top_interaction_pairs": self.interaction_analysis.top_interaction_pairs(filtered_df, top_n=100, graph=graph),
+            "graph_metrics": self.interaction_analysis.graph_metrics(filtered_df, graph=graph),
             "conversation_concentration": self.interaction_analysis.conversation_concentration(filtered_df)
         }
 
+        if graph_reduction:
+            graph = graph.reduce(GraphReduction(**graph_reduction))
+            result["graph_reduction"] = {
+                **graph_reduction,
+                "authors": graph.node_count,
+                "edges": graph.edge_count,
+            }
+
+        result["interaction_graph"] = self.interaction_analysis.interaction_graph(filtered_df, graph=graph)
+        return result
+
+    @requires_columns("content", "ner_entities", *EMOTION_COLUMNS)
     def cultural(
         self,
         df: pd.DataFrame,
         filters: dict | None = None,
         dataset_id: int | None = None,
+        tokens: TokenStore | None = None,
+        lexicons: dict | None = None,
     ) -> dict:
+        """
+        lexicons are the dataset's own marker categories, see
+        Lexicon.from_dict. Identity, stance and lexicon markers come from
+        the same scans of the content, see LexiconMatcher.
+        """
         filtered_df = self._prepare_filtered_df(df, filters)
+        tokens = tokens_for(filtered_df, tokens)
+        lexicon = lexicon_for(lexicons)
 
-        return {
-            "identity_markers": self.cultural_analysis.get_identity_markers(filtered_df),
-            "stance_markers": self.cultural_analysis.get_stance_markers(filtered_df),
+        result = {
+            "identity_markers": self.cultural_analysis.get_identity_markers(filtered_df, tokens=tokens, lexicon=lexicon),
+            "stance_markers": self.cultural_analysis.get_stance_markers(filtered_df, tokens=tokens, lexicon=lexicon),
             "avg_emotion_per_entity": self.cultural_analysis.get_avg_emotions_per_entity(filtered_df)
         }
 
+        if lexicon.custom_names():
+            result["lexicon_markers"] = self.cultural_analysis.get_lexicon_markers(filtered_df, lexicon, tokens=tokens)
+
+        return result
+
+    @requires_columns("type", "author", "dt", "source")
+    def summary_from_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        filters: dict | None = None,
+        dataset_id: int | None = None,
+    ) -> dict:
+        return self.summary_analysis.summary_from_chunks(
+            self._prepare_filtered_df(chunk, filters) for chunk in chunks
+        )
+
+    @requires_columns("type", "author", "dt", "source")
     def summary(
         self,
         df: pd.DataFrame,
@@ -1,5 +1,7 @@
 import pandas as pd
 
+from typing import Iterable
+
 
 class SummaryAnalysis:
     def total_events(self, df: pd.DataFrame) -> int:
@@ -62,3 +64,52 @@ class SummaryAnalysis:
             "time_range": self.time_range(df),
             "sources": self.sources(df),
         }
+
+    def summary_from_chunks(self, chunks: Iterable[pd.DataFrame]) -> dict:
+        """
+        Same result as summary(), accumulated one chunk at a time so the
+        dataset never has to be materialised as a single frame.
+        """
+        total_events = 0
+        total_posts = 0
+        total_comments = 0
+        events_per_user = pd.Series(dtype="int64")
+        start = None
+        end = None
+        sources: list = []
+
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+
+            total_events += self.total_events(chunk)
+            total_posts += self.total_posts(chunk)
+            total_comments += self.total_comments(chunk)
+            events_per_user = events_per_user.add(
+                chunk.groupby("author").size(), fill_value=0
+            )
+
+            chunk_start, chunk_end = chunk["dt"].min(), chunk["dt"].max()
+            start = chunk_start if start is None else min(start, chunk_start)
+            end = chunk_end if end is None else max(end, chunk_end)
+
+            sources.extend(
+                source for source in self.sources(chunk) if source not in sources
+            )
+
+        if total_events == 0:
+            return self.empty_summary()
+
+        return {
+            "total_events": total_events,
+            "total_posts": total_posts,
+            "total_comments": total_comments,
+            "unique_users": int(len(events_per_user)),
+            "comments_per_post": self.comments_per_post(total_comments, total_posts),
+            "lurker_ratio": round((events_per_user == 1).mean(), 2),
+            "time_range": {
+                "start": int(start.timestamp()),
+                "end": int(end.timestamp()),
+            },
+            "sources": sources,
+        }
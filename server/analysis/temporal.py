@@ -39,12 +39,18 @@ class TemporalAnalysis:
 
         return grouped.to_dict(orient="records")
 
-    def posts_per_day(self, df: pd.DataFrame) -> list[dict]:
-        per_day = df.groupby("date").size().reset_index(name="count")
+    def day_counts(self, df: pd.DataFrame) -> pd.Series:
+        return df.groupby("date").size()
+
+    def weekday_hour_counts(self, df: pd.DataFrame) -> pd.Series:
+        return df.groupby(["weekday", "hour"]).size()
+
+    def posts_per_day_from_counts(self, counts: pd.Series) -> list[dict]:
+        per_day = counts.sort_index().astype(int).reset_index(name="count")
 
         return per_day.to_dict(orient="records")
 
-    def heatmap(self, df: pd.DataFrame) -> list[dict]:
+    def heatmap_from_counts(self, counts: pd.Series) -> list[dict]:
         weekday_order = [
             "Monday",
             "Tuesday",
@@ -55,17 +61,16 @@ class TemporalAnalysis:
             "Sunday",
         ]
 
-        df = df.copy()
-        df["weekday"] = pd.Categorical(
-            df["weekday"], categories=weekday_order, ordered=True
-        )
-
-        heatmap = (
-            df.groupby(["weekday", "hour"], observed=True)
-            .size()
-            .unstack(fill_value=0)
-            .reindex(columns=range(24), fill_value=0)
-        )
+        heatmap = counts.astype(int).unstack(fill_value=0)
+        heatmap = heatmap.reindex(
+            [day for day in weekday_order if day in heatmap.index]
+        ).reindex(columns=range(24), fill_value=0)
 
         heatmap.columns = heatmap.columns.map(str)
         return heatmap.to_dict(orient="records")
+
+    def posts_per_day(self, df: pd.DataFrame) -> list[dict]:
+        return self.posts_per_day_from_counts(self.day_counts(df))
+
+    def heatmap(self, df: pd.DataFrame) -> list[dict]:
+        return self.heatmap_from_counts(self.weekday_hour_counts(df))
@@ -0,0 +1,256 @@
+import os
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Iterable, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from server.analysis.lexicon import Lexicon, compile_lexicon
+
+View = TypeVar("View")
+
+# A tokenised frame holds an id for every word of a dataset, so only a
+# couple are kept per process
+token_cache_size = int(os.getenv("TOKEN_CACHE_SIZE", 2))
+
+# A token is a whole word made only of lowercase letters. The matches of
+# longer minimum lengths are exactly the matches of this pattern that are
+# long enough, so every view is derived from one pass over the text.
+WORD_PATTERN = re.compile(r"\b[a-z]{2,}\b")
+MIN_TOKEN_LENGTH = 2
+
+CLEANING_PATTERNS = [
+    re.compile(r"http\S+"),  # remove URLs
+    re.compile(r"www\S+"),
+    re.compile(r"&\w+;"),  # remove HTML entities
+    re.compile(r"\bamp\b"),  # remove stray amp
+    re.compile(r"\S+\.(jpg|jpeg|png|webp|gif)"),
+]
+
+
+def clean_text(text: str) -> str:
+    for pattern in CLEANING_PATTERNS:
+        text = pattern.sub("", text)
+    return text
+
+
+@dataclass(frozen=True)
+class EncodedTokens:
+    """
+    Tokens of a sequence of events as integer vocabulary ids. vocab holds
+    each distinct token in order of first appearance, codes the vocabulary
+    id of every token, event after event. The tokens of event i are
+    codes[offsets[i]:offsets[i + 1]].
+    """
+
+    vocab: np.ndarray
+    codes: np.ndarray
+    offsets: np.ndarray
+
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "EncodedTokens":
+        # Tokens become ids as they are found, so the strings of the corpus
+        # are never held at once, only one per distinct token
+        ids: dict[str, int] = {}
+        codes = array("q")
+        offsets = array("q", [0])
+
+        for text in texts:
+            codes.extend([ids.setdefault(token, len(ids)) for token in WORD_PATTERN.findall(text)])
+            offsets.append(len(codes))
+
+        return cls(
+            vocab=np.array(list(ids), dtype=object),
+            codes=np.frombuffer(codes, dtype=np.int64),
+            offsets=np.frombuffer(offsets, dtype=np.int64),
+        )
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of tokens of each event."""
+        return np.diff(self.offsets)
+
+    def events(self) -> np.ndarray:
+        """Position of the event each token came from."""
+        return np.repeat(np.arange(len(self.offsets) - 1), self.lengths)
+
+    def excluded(self, exclusions: Iterable[str]) -> np.ndarray:
+        """Mask over vocabulary ids of the tokens in exclusions."""
+        exclusions = frozenset(exclusions)
+        return np.fromiter(
+            (token in exclusions for token in self.vocab), dtype=bool, count=len(self.vocab)
+        )
+
+    def select(self, keep: np.ndarray) -> "EncodedTokens":
+        """
+        Only the tokens whose vocabulary id is set in keep, renumbered in
+        order of first appearance.
+        """
+        kept = keep[self.codes]
+        codes, ids = pd.factorize(self.codes[kept])
+        kept_before = np.concatenate([[0], np.cumsum(kept)])
+
+        return EncodedTokens(
+            vocab=self.vocab[ids], codes=codes, offsets=kept_before[self.offsets]
+        )
+
+    def token_lists(self) -> list[list[str]]:
+        words = self.vocab[self.codes]
+        return [
+            words[start:end].tolist()
+            for start, end in zip(self.offsets[:-1], self.offsets[1:])
+        ]
+
+
+class TokenStore:
+    """
+    Text and token views of a frame's content, each computed on first use
+    and shared by every analysis reading the same events. Tokens are kept
+    as integer vocabulary ids, text and token Series are aligned with the
+    frame's index.
+
+    Sources:
+        raw      content as is, missing content as ""
+        lowered  raw, lowercased
+        cleaned  URLs, HTML entities and image names removed, lowercased.
+                 Events without content are left out. Tokens only.
+    """
+
+    def __init__(self, content: pd.Series):
+        self.content = content
+        self._views: dict[tuple, object] = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, content_col: str = "content") -> "TokenStore":
+        return cls(df[content_col])
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """Whether the store was built from these rows, in this order."""
+        return self.content.index.equals(df.index)
+
+    def _view(self, key: tuple, compute: Callable[[], View]) -> View:
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = self._views[key] = compute()
+            return view
+
+    def text(self, source: str = "lowered") -> pd.Series:
+        if source == "raw":
+            return self._view(("raw",), lambda: self.content.fillna("").astype(str))
+        if source == "lowered":
+            return self._view(("lowered",), lambda: self.text("raw").str.lower())
+        raise ValueError(f"Unknown text source: {source}")
+
+    def _texts(self, source: str) -> Iterable[str]:
+        if source == "cleaned":
+            # Only tokenised, so the cleaned corpus isn't kept
+            return (clean_text(text).lower() for text in self.content.dropna().astype(str))
+        return self.text(source)
+
+    def _index(self, source: str) -> pd.Index:
+        if source == "cleaned":
+            return self.content.dropna().index
+        return self.content.index
+
+    def encoded(
+        self, source: str = "lowered", min_length: int = MIN_TOKEN_LENGTH
+    ) -> EncodedTokens:
+        if min_length < MIN_TOKEN_LENGTH:
+            raise ValueError(f"min_length must be at least {MIN_TOKEN_LENGTH}")
+
+        if min_length == MIN_TOKEN_LENGTH:
+            return self._view(
+                ("encoded", source), lambda: EncodedTokens.from_texts(self._texts(source))
+            )
+
+        base = self.encoded(source)
+        long_enough = np.fromiter(
+            (len(token) >= min_length for token in base.vocab),
+            dtype=bool,
+            count=len(base.vocab),
+        )
+        return self._view(("encoded", source, min_length), lambda: base.select(long_enough))
+
+    def tokens(
+        self,
+        source: str = "lowered",
+        min_length: int = MIN_TOKEN_LENGTH,
+        exclusions: Iterable[str] | None = None,
+    ) -> pd.Series:
+        """Tokens of each event, in order, without any in exclusions."""
+        exclusions = frozenset(exclusions or ())
+
+        def compute() -> pd.Series:
+            encoded = self.encoded(source, min_length)
+            if exclusions:
+                encoded = encoded.select(~encoded.excluded(exclusions))
+
+            return pd.Series(encoded.token_lists(), index=self._index(source), dtype=object)
+
+        return self._view(("tokens", source, min_length, exclusions), compute)
+
+    def token_counts(
+        self, source: str = "lowered", min_length: int = MIN_TOKEN_LENGTH
+    ) -> pd.Series:
+        return self._view(
+            ("counts", source, min_length),
+            lambda: pd.Series(
+                self.encoded(source, min_length).lengths, index=self._index(source)
+            ),
+        )
+
+    def marker_counts(self, lexicon: Lexicon) -> pd.DataFrame:
+        """Matches of each lexicon category in each event's lowered text."""
+        return self._view(
+            ("markers", lexicon), lambda: compile_lexicon(lexicon).counts(self.text("lowered"))
+        )
+
+
+def tokens_for(
+    df: pd.DataFrame, tokens: TokenStore | None = None, content_col: str = "content"
+) -> TokenStore:
+    """tokens if it was built from df's rows, otherwise a new store for df."""
+    if tokens is not None and tokens.matches(df):
+        return tokens
+    return TokenStore.from_frame(df, content_col)
+
+
+class TokenStoreCache:
+    """
+    Least recently used TokenStores, keyed by the content they were built
+    from (dataset, content stamp and filters).
+    """
+
+    def __init__(self, max_entries: int = token_cache_size):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, TokenStore] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, df: pd.DataFrame) -> TokenStore:
+        with self._lock:
+            store = self._entries.get(key)
+            if store is not None and store.matches(df):
+                self._entries.move_to_end(key)
+                return store
+
+        store = TokenStore.from_frame(df)
+        if self.max_entries <= 0:
+            return store
+
+        with self._lock:
+            self._entries[key] = store
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return store
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
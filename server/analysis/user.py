@@ -1,23 +1,23 @@
 import pandas as pd
-import re
 
 from collections import Counter
 
+from server.analysis.tokens import TokenStore, tokens_for
+
 
 class UserAnalysis:
     def __init__(self, word_exclusions: set[str]):
         self.word_exclusions = word_exclusions
 
-    def _tokenize(self, text: str):
-        tokens = re.findall(r"\b[a-z]{3,}\b", text)
-        return [t for t in tokens if t not in self.word_exclusions]
-
     def _vocab_richness_per_user(
-        self, df: pd.DataFrame, min_words: int = 20, top_most_used_words: int = 100
+        self,
+        df: pd.DataFrame,
+        min_words: int = 20,
+        top_most_used_words: int = 100,
+        tokens: TokenStore | None = None,
     ) -> list:
-        df = df.copy()
-        df["content"] = df["content"].fillna("").astype(str).str.lower()
-        df["tokens"] = df["content"].apply(self._tokenize)
+        words = tokens_for(df, tokens).tokens("lowered", 3, self.word_exclusions)
+        df = df[["author"]].assign(tokens=words)
 
         rows = []
         for author, group in df.groupby("author"):
@@ -60,14 +60,11 @@ class UserAnalysis:
     def top_users(self, df: pd.DataFrame) -> list:
         counts = df.groupby(["author", "source"]).size().sort_values(ascending=False)
 
-        top_users = [
-            {"author": author, "source": source, "count": int(count)}
-            for (author, source), count in counts.items()
-        ]
-
-        return top_users
+        return counts.reset_index(name="count").to_dict(orient="records")
 
-    def per_user_analysis(self, df: pd.DataFrame) -> dict:
+    def per_user_analysis(
+        self, df: pd.DataFrame, tokens: TokenStore | None = None
+    ) -> dict:
         per_user = df.groupby(["author", "type"]).size().unstack(fill_value=0)
 
         emotion_cols = [col for col in df.columns if col.startswith("emotion_")]
@@ -76,10 +73,7 @@ class UserAnalysis:
         avg_emotions_by_author = {}
         if emotion_cols:
             avg_emotions = df.groupby("author")[emotion_cols].mean().fillna(0.0)
-            avg_emotions_by_author = {
-                author: {emotion: float(score) for emotion, score in row.items()}
-                for author, row in avg_emotions.iterrows()
-            }
+            avg_emotions_by_author = avg_emotions.to_dict(orient="index")
 
         if "topic" in df.columns:
             topic_df = df[
@@ -98,13 +92,12 @@ class UserAnalysis:
                     )
                     .drop_duplicates(subset=["author"])
                 )
-                dominant_topic_by_author = {
-                    row["author"]: {
-                        "topic": row["topic"],
-                        "count": int(row["count"]),
-                    }
-                    for _, row in topic_counts.iterrows()
-                }
+                dominant_topic_by_author = dict(
+                    zip(
+                        topic_counts["author"],
+                        topic_counts[["topic", "count"]].to_dict(orient="records"),
+                    )
+                )
 
         # ensure columns always exist
         for col in ("post", "comment"):
@@ -120,7 +113,7 @@ class UserAnalysis:
         per_user = per_user.sort_values("comment_post_ratio", ascending=True)
         per_user_records = per_user.reset_index().to_dict(orient="records")
 
-        vocab_rows = self._vocab_richness_per_user(df)
+        vocab_rows = self._vocab_richness_per_user(df, tokens=tokens)
         vocab_by_author = {row["author"]: row for row in vocab_rows}
 
         # merge vocab richness + per_user information
@@ -1,29 +1,47 @@
 import os
 import pandas as pd
+import threading
+import time
 import traceback
 import json
 
+from datetime import timedelta
+
 from dotenv import load_dotenv
-from flask import Flask, jsonify, request
+from flask import Flask, g, has_request_context, jsonify, request, stream_with_context
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import (
     JWTManager,
     create_access_token,
     jwt_required,
+    get_jwt,
     get_jwt_identity,
 )
 
-from server.analysis.stat_gen import StatGen
+from server.analysis.lexicon import MARKER_LEXICON, Lexicon
+from server.analysis.stat_gen import ANALYSES, StatGen
 from server.exceptions import NotAuthorisedException, NonExistentDatasetException
-from server.db.database import PostgresConnector
+from server.db.database import get_connector
 from server.core.auth import AuthManager
-from server.core.datasets import DatasetManager
-from server.utils import get_request_filters, get_env
-from server.queue.tasks import process_dataset, fetch_and_process_dataset
+from server.core.cache import analysis_key, get_result_cache, result_etag
+from server.core.compression import encoded_etags, init_compression
+from server.core.compression import metrics as compression_metrics
+from server.core.datasets import DatasetManager, dataset_cache_max_bytes
+from server.core.export import iter_json_array, iter_ndjson, json_page
+from server.core.frame_cache import FrameCache
+from server.core.serialization import OrjsonProvider, dumps
+from server.core.status import TERMINAL_STATUSES, get_status_publisher
+from server.utils import get_graph_reduction, get_request_filters, get_env
+from server.queue.celery_app import (
+    FETCH_AND_PROCESS_DATASET_TASK,
+    PROCESS_DATASET_TASK,
+    celery,
+)
 from server.connectors.registry import get_available_connectors, get_connector_metadata
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Env Variables
 load_dotenv()
@@ -34,20 +52,64 @@ jwt_access_token_expires = int(
     os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 1200)
 )  # Default to 20 minutes
 
+# Event export page sizes for /dataset/<id>/all
+default_export_page_size = int(os.getenv("EXPORT_PAGE_SIZE", 1000))
+max_export_page_size = int(os.getenv("MAX_EXPORT_PAGE_SIZE", 10_000))
+
+# A status event stream holds a worker thread for as long as its job runs,
+# so each process serves at most this many, fewer than gunicorn's --threads.
+# More would need an async worker class such as gevent.
+max_status_streams = int(os.getenv("MAX_STATUS_STREAMS", 2))
+
+# Lifetime of the stream-scoped tokens EventSource passes as ?jwt=
+status_stream_token_expires = int(os.getenv("STATUS_STREAM_TOKEN_EXPIRES", 60))
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
 # Flask Configuration
-CORS(app, resources={r"/*": {"origins": frontend_url}})
+CORS(app, resources={r"/*": {"origins": frontend_url}}, expose_headers=["ETag"])
 app.config["JWT_SECRET_KEY"] = jwt_secret_key
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = jwt_access_token_expires
 
+init_compression(app)
+
 # Security
 bcrypt = Bcrypt(app)
 jwt = JWTManager(app)
 
+
+@jwt.token_verification_loader
+def verify_token_scope(jwt_header, jwt_data):
+    # Stream tokens end up in URLs and access logs, so they open nothing else
+    return "stream" not in jwt_data or request.endpoint == "stream_dataset_status"
+
+
 # Helper Objects
-db = PostgresConnector()
+db = get_connector()
 auth_manager = AuthManager(db, bcrypt)
-dataset_manager = DatasetManager(db)
+status_publisher = get_status_publisher()
+status_stream_slots = threading.BoundedSemaphore(max_status_streams)
+
+
+def request_dataset_contexts() -> dict | None:
+    # Dataset rows fetched during the current request, see get_dataset_context
+    if not has_request_context():
+        return None
+
+    if "dataset_contexts" not in g:
+        g.dataset_contexts = {}
+
+    return g.dataset_contexts
+
+
+dataset_manager = DatasetManager(
+    db,
+    FrameCache(dataset_cache_max_bytes),
+    status_publisher=status_publisher,
+    context_store=request_dataset_contexts,
+)
 stat_gen = StatGen()
+result_cache = get_result_cache()
 connectors = get_available_connectors()
 
 # Default Files
@@ -76,6 +138,94 @@ def normalize_topics(topics):
     return normalized
 
 
+def validate_source_configs(source_configs, connector_metadata) -> str | None:
+    if not isinstance(source_configs, list) or len(source_configs) == 0:
+        return "Sources must be a non-empty list"
+
+    for source in source_configs:
+        if not isinstance(source, dict):
+            return "Each source must be an object"
+
+        if "name" not in source:
+            return "Each source must contain a name"
+
+        name = source["name"]
+        limit = source.get("limit", 1000)
+        category = source.get("category")
+        search = source.get("search")
+
+        if limit:
+            try:
+                limit = int(limit)
+            except (ValueError, TypeError):
+                return "Limit must be an integer"
+
+            if limit > 1000:
+                limit = 1000
+
+        if name not in connector_metadata:
+            return "Source not supported"
+
+        if search and not connector_metadata[name]["search_enabled"]:
+            return f"Source {name} does not support search"
+
+        if category and not connector_metadata[name]["categories_enabled"]:
+            return f"Source {name} does not support categories"
+
+        # if category and not connectors[name]().category_exists(category):
+        #     return f"Category does not exist for {name}"
+
+    return None
+
+
+def analysis_response(dataset_id: int, analysis: str, options: dict | None = None):
+    """
+    Run one StatGen analysis with the request's filters, the dataset's
+    options and the given ones, through the result cache. The cached body
+    is already serialised, so it is sent as is.
+    """
+    filters = get_request_filters()
+    options = {
+        **stat_gen.dataset_options(analysis, dataset_manager, dataset_id),
+        **(options or {}),
+    }
+    stamp = dataset_manager.get_content_stamp(dataset_id)
+    key = analysis_key(analysis, options)
+
+    etag = result_etag(dataset_id, stamp, key, filters)
+    if etag and etag_matches(etag):
+        return not_modified(etag)
+
+    body = result_cache.get_or_compute(
+        dataset_id,
+        stamp,
+        key,
+        filters,
+        lambda: stat_gen.run(analysis, dataset_manager, dataset_id, filters, options),
+    )
+    response = app.response_class(body + b"\n", mimetype=app.json.mimetype)
+    return with_etag(response, etag)
+
+
+def etag_matches(etag: str) -> bool:
+    # Compressed responses carry the encoding in their ETag, see compress_response
+    return any(tag in request.if_none_match for tag in encoded_etags(etag))
+
+
+def not_modified(etag: str):
+    return with_etag(app.response_class(status=304), etag)
+
+
+def with_etag(response, etag: str | None):
+    # Clients may keep the response but must revalidate it on every use
+    if etag:
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+
+    return response
+
+
 @app.route("/register", methods=["POST"])
 def register_user():
     data = request.get_json()
@@ -146,6 +296,20 @@ def get_user_datasets():
     return jsonify(dataset_manager.get_user_datasets(current_user)), 200
 
 
+@app.route("/metrics", methods=["GET"])
+@jwt_required()
+def get_metrics():
+    return (
+        jsonify(
+            {
+                "frame_cache": dataset_manager.cache_stats(),
+                "compression": compression_metrics.stats(),
+            }
+        ),
+        200,
+    )
+
+
 @app.route("/datasets/sources", methods=["GET"])
 def get_dataset_sources():
     list_metadata = list(get_connector_metadata().values())
@@ -171,42 +335,9 @@ def fetch_data():
     topics_for_processing = default_topic_list
 
     source_configs = data["sources"]
-
-    if not isinstance(source_configs, list) or len(source_configs) == 0:
-        return jsonify({"error": "Sources must be a non-empty list"}), 400
-
-    for source in source_configs:
-        if not isinstance(source, dict):
-            return jsonify({"error": "Each source must be an object"}), 400
-
-        if "name" not in source:
-            return jsonify({"error": "Each source must contain a name"}), 400
-
-        name = source["name"]
-        limit = source.get("limit", 1000)
-        category = source.get("category")
-        search = source.get("search")
-
-        if limit:
-            try:
-                limit = int(limit)
-            except (ValueError, TypeError):
-                return jsonify({"error": "Limit must be an integer"}), 400
-
-            if limit > 1000:
-                limit = 1000
-
-        if name not in connector_metadata:
-            return jsonify({"error": "Source not supported"}), 400
-
-        if search and not connector_metadata[name]["search_enabled"]:
-            return jsonify({"error": f"Source {name} does not support search"}), 400
-
-        if category and not connector_metadata[name]["categories_enabled"]:
-            return jsonify({"error": f"Source {name} does not support categories"}), 400
-
-        # if category and not connectors[name]().category_exists(category):
-        #     return jsonify({"error": f"Category does not exist for {name}"}), 400
+    source_error = validate_source_configs(source_configs, connector_metadata)
+    if source_error:
+        return jsonify({"error": source_error}), 400
 
     if custom_topics is not None:
         normalized_topics = normalize_topics(custom_topics)
@@ -233,7 +364,10 @@ def fetch_data():
             f"Data is being fetched from {', '.join(source['name'] for source in source_configs)}",
         )
 
-        fetch_and_process_dataset.delay(dataset_id, source_configs, topics_for_processing)
+        celery.send_task(
+            FETCH_AND_PROCESS_DATASET_TASK,
+            args=[dataset_id, source_configs, topics_for_processing],
+        )
     except Exception:
         print(traceback.format_exc())
         return jsonify({"error": "Failed to queue dataset processing"}), 500
@@ -285,7 +419,10 @@ def upload_data():
             current_user, dataset_name, topics
         )
 
-        process_dataset.delay(dataset_id, posts_df.to_dict(orient="records"), topics)
+        celery.send_task(
+            PROCESS_DATASET_TASK,
+            args=[dataset_id, posts_df.to_dict(orient="records"), topics],
+        )
 
         return (
             jsonify(
@@ -314,7 +451,7 @@ def get_dataset(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_info = dataset_manager.get_dataset_info(dataset_id)
+        dataset_info = dataset_manager.get_dataset_context(dataset_id)
         included_cols = {"id", "name", "created_at"}
 
         return jsonify({k: dataset_info[k] for k in included_cols}), 200
@@ -373,6 +510,7 @@ def delete_dataset(dataset_id):
 
         dataset_manager.delete_dataset_info(dataset_id)
         dataset_manager.delete_dataset_content(dataset_id)
+        result_cache.invalidate(dataset_id)
         return (
             jsonify(
                 {
@@ -390,6 +528,120 @@ def delete_dataset(dataset_id):
         return jsonify({"error": "An unexpected error occured"}), 500
 
 
+@app.route("/dataset/<int:dataset_id>/fetch", methods=["POST"])
+@jwt_required()
+def append_fetched_data(dataset_id):
+    data = request.get_json()
+    connector_metadata = get_connector_metadata()
+
+    if not data or "sources" not in data:
+        return jsonify({"error": "Sources must be provided"}), 400
+
+    source_configs = data["sources"]
+    source_error = validate_source_configs(source_configs, connector_metadata)
+    if source_error:
+        return jsonify({"error": source_error}), 400
+
+    try:
+        user_id = int(get_jwt_identity())
+
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        topics = dataset_manager.get_dataset_context(dataset_id)["topics"] or default_topic_list
+
+        dataset_manager.set_dataset_status(
+            dataset_id,
+            "fetching",
+            f"New data is being fetched from {', '.join(source['name'] for source in source_configs)}",
+        )
+
+        celery.send_task(
+            FETCH_AND_PROCESS_DATASET_TASK,
+            args=[dataset_id, source_configs, topics],
+            kwargs={"mode": "append"},
+        )
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": "Failed to queue dataset processing"}), 500
+
+    return (
+        jsonify(
+            {
+                "message": "New data queued for processing",
+                "dataset_id": dataset_id,
+                "status": "fetching",
+            }
+        ),
+        202,
+    )
+
+
+@app.route("/dataset/<int:dataset_id>/upload", methods=["POST"])
+@jwt_required()
+def append_uploaded_data(dataset_id):
+    if "posts" not in request.files:
+        return jsonify({"error": "Missing required files or form data"}), 400
+
+    post_file = request.files["posts"]
+
+    if post_file.filename == "":
+        return jsonify({"error": "Empty filename"}), 400
+
+    if not post_file.filename.endswith(".jsonl"):
+        return (
+            jsonify({"error": "Invalid file type. Only .jsonl files are allowed."}),
+            400,
+        )
+
+    try:
+        user_id = int(get_jwt_identity())
+
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        posts_df = pd.read_json(post_file, lines=True, convert_dates=False)
+        topics = dataset_manager.get_dataset_context(dataset_id)["topics"] or default_topic_list
+
+        dataset_manager.set_dataset_status(
+            dataset_id, "processing", "New data queued for processing"
+        )
+
+        celery.send_task(
+            PROCESS_DATASET_TASK,
+            args=[dataset_id, posts_df.to_dict(orient="records"), topics],
+            kwargs={"mode": "append"},
+        )
+
+        return (
+            jsonify(
+                {
+                    "message": "New data queued for processing",
+                    "dataset_id": dataset_id,
+                    "status": "processing",
+                }
+            ),
+            202,
+        )
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except ValueError:
+        return jsonify({"error": f"Failed to read JSONL file"}), 400
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": f"An unexpected error occurred"}), 500
+
+
 @app.route("/dataset/<int:dataset_id>/status", methods=["GET"])
 @jwt_required()
 def get_dataset_status(dataset_id):
@@ -412,6 +664,128 @@ def get_dataset_status(dataset_id):
         return jsonify({"error": "An unexpected error occured"}), 500
 
 
+@app.route("/dataset/<int:dataset_id>/status/stream/token", methods=["POST"])
+@jwt_required()
+def create_status_stream_token(dataset_id):
+    """
+    A token that only opens the status stream of this dataset and expires
+    after STATUS_STREAM_TOKEN_EXPIRES seconds. EventSource can't set
+    headers, so the stream takes its token as ?jwt=, where it is logged.
+    """
+    try:
+        user_id = int(get_jwt_identity())
+
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        stream_token = create_access_token(
+            identity=str(user_id),
+            expires_delta=timedelta(seconds=status_stream_token_expires),
+            additional_claims={"stream": dataset_id},
+        )
+        return jsonify({"stream_token": stream_token}), 200
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": "An unexpected error occured"}), 500
+
+
+@app.route("/dataset/<int:dataset_id>/status/stream", methods=["GET"])
+@jwt_required(locations=["query_string"])
+def stream_dataset_status(dataset_id):
+    """
+    Server-sent events with the dataset's status and progress, pushed from
+    the worker over Redis pub/sub. Takes a token from
+    create_status_stream_token as ?jwt=. The stream ends after complete or
+    error, and answers 503 once MAX_STATUS_STREAMS are open, clients fall
+    back to polling /status.
+    """
+
+    def stored_status() -> dict:
+        dataset_status = dataset_manager.get_dataset_status(dataset_id)
+        return {
+            "status": dataset_status["status"],
+            "status_message": dataset_status["status_message"],
+            "progress": 100 if dataset_status["status"] in TERMINAL_STATUSES else None,
+        }
+
+    try:
+        user_id = int(get_jwt_identity())
+
+        if get_jwt().get("stream") != dataset_id:
+            raise NotAuthorisedException("Not a status stream token for this dataset")
+
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        if not status_stream_slots.acquire(blocking=False):
+            return jsonify({"error": "Too many open status streams"}), 503
+
+        try:
+            # Subscribed before reading the current state, so nothing is missed
+            events = status_publisher.subscribe(dataset_id)
+        except Exception:
+            status_stream_slots.release()
+            raise
+
+        def close():
+            events.close()
+            status_stream_slots.release()
+
+        try:
+            # Nothing published yet, e.g. a dataset from before status events
+            current = status_publisher.last(dataset_id) or stored_status()
+        except Exception:
+            close()
+            raise
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": "An unexpected error occured"}), 500
+
+    def stream():
+        event = current
+
+        while True:
+            if event is None:
+                # Publishing is best effort, so a terminal event that never
+                # arrived is picked up from the database instead
+                try:
+                    event = stored_status()
+                except NonExistentDatasetException:
+                    return
+
+                if event["status"] not in TERMINAL_STATUSES:
+                    event = None
+
+            if event is None:
+                # Comment line, keeps proxies from timing the stream out
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: status\ndata: {dumps(event).decode()}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    return
+
+            event = next(events)
+
+    response = app.response_class(stream(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    # Runs even if the client leaves before the stream starts
+    response.call_on_close(close)
+    return response
+
+
 @app.route("/dataset/<int:dataset_id>/linguistic", methods=["GET"])
 @jwt_required()
 def get_linguistic_analysis(dataset_id):
@@ -422,9 +796,7 @@ def get_linguistic_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.linguistic(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "linguistic")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -446,9 +818,7 @@ def get_emotional_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.emotional(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "emotional")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -470,9 +840,7 @@ def get_summary(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.summary(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "summary")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -494,9 +862,7 @@ def get_temporal_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.temporal(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "temporal")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -518,9 +884,7 @@ def get_user_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.user(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "user")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -542,9 +906,7 @@ def get_cultural_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
-        filters = get_request_filters()
-        return jsonify(stat_gen.cultural(dataset_content, filters, dataset_id=dataset_id)), 200
+        return analysis_response(dataset_id, "cultural")
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -556,6 +918,68 @@ def get_cultural_analysis(dataset_id):
         return jsonify({"error": f"An unexpected error occurred"}), 500
 
 
+@app.route("/dataset/<int:dataset_id>/lexicons", methods=["GET"])
+@jwt_required()
+def get_dataset_lexicons(dataset_id):
+    try:
+        user_id = int(get_jwt_identity())
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        return jsonify(
+            {
+                "lexicons": dataset_manager.get_dataset_lexicons(dataset_id),
+                "defaults": MARKER_LEXICON,
+            }
+        ), 200
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
+@app.route("/dataset/<int:dataset_id>/lexicons", methods=["PUT"])
+@jwt_required()
+def update_dataset_lexicons(dataset_id):
+    try:
+        user_id = int(get_jwt_identity())
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            raise ValueError("Expected a JSON object with lexicons")
+
+        lexicons = body.get("lexicons") or {}
+
+        # Validated and normalised as the analysis will read them
+        lexicon = Lexicon.from_dict(lexicons)
+        lexicons = {
+            category: list(phrases)
+            for category, phrases in lexicon.categories
+            if category in lexicons
+        }
+
+        dataset_manager.update_dataset_lexicons(dataset_id, lexicons)
+        return jsonify({"lexicons": lexicons}), 200
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        print(traceback.format_exc())
+        return jsonify({"error": "An unexpected error occurred"}), 500
+
+
 @app.route("/dataset/<int:dataset_id>/interactional", methods=["GET"])
 @jwt_required()
 def get_interaction_analysis(dataset_id):
@@ -566,9 +990,104 @@ def get_interaction_analysis(dataset_id):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
+        try:
+            reduction = get_graph_reduction()
+        except ValueError as e:
+            # Tells the client which parameter was rejected
+            return jsonify({"error": str(e)}), 400
+
+        options = {"graph_reduction": reduction} if reduction else None
+
+        return analysis_response(dataset_id, "interactional", options)
+    except NotAuthorisedException:
+        return jsonify({"error": "User is not authorised to access this content"}), 403
+    except NonExistentDatasetException:
+        return jsonify({"error": "Dataset does not exist"}), 404
+    except ValueError as e:
+        return jsonify({"error": f"Malformed or missing data"}), 400
+    except Exception as e:
+        print(traceback.format_exc())
+        return jsonify({"error": f"An unexpected error occurred"}), 500
+
+
+@app.route("/dataset/<int:dataset_id>/dashboard", methods=["GET"])
+@jwt_required()
+def get_dashboard(dataset_id):
+    try:
+        user_id = int(get_jwt_identity())
+        if not dataset_manager.authorize_user_dataset(dataset_id, user_id):
+            raise NotAuthorisedException(
+                "This user is not authorised to access this dataset"
+            )
+
+        sections = request.args.getlist("sections")
+        if len(sections) == 1 and "," in sections[0]:
+            sections = [section.strip() for section in sections[0].split(",") if section.strip()]
+        sections = list(dict.fromkeys(sections)) or ANALYSES
+
+        unknown_sections = set(sections) - set(ANALYSES)
+        if unknown_sections:
+            return jsonify({"error": f"Unknown sections: {', '.join(sorted(unknown_sections))}"}), 400
+
         filters = get_request_filters()
-        return jsonify(stat_gen.interactional(dataset_content, filters, dataset_id=dataset_id)), 200
+        stamp = dataset_manager.get_content_stamp(dataset_id)
+
+        options = {
+            section: stat_gen.dataset_options(section, dataset_manager, dataset_id)
+            for section in sections
+        }
+        keys = {section: analysis_key(section, options[section]) for section in sections}
+
+        etag = result_etag(
+            dataset_id, stamp, f"dashboard:{','.join(keys[section] for section in sections)}", filters
+        )
+        if etag and etag_matches(etag):
+            return not_modified(etag)
+
+        bodies = {}
+        timings = {}
+
+        if stamp is not None:
+            for section in sections:
+                start = time.perf_counter()
+                body = result_cache.get(dataset_id, stamp, keys[section], filters)
+                if body is not None:
+                    bodies[section] = body
+                    timings[section] = time.perf_counter() - start
+
+        # One load, filtered in SQL, shared by every section not in the cache
+        missing = [section for section in sections if section not in bodies]
+        if missing:
+            start = time.perf_counter()
+            dataset_content = dataset_manager.get_dataset_content(
+                dataset_id, filters, columns=stat_gen.columns_for(missing)
+            )
+            timings["load"] = time.perf_counter() - start
+
+            for section in missing:
+                start = time.perf_counter()
+                body = dumps(
+                    stat_gen.analyse(
+                        section,
+                        dataset_content,
+                        filters,
+                        dataset_id,
+                        dataset_manager,
+                        options[section],
+                    )
+                )
+                if stamp is not None:
+                    result_cache.set(dataset_id, stamp, keys[section], filters, body)
+
+                bodies[section] = body
+                timings[section] = time.perf_counter() - start
+
+        # Cached sections are already serialised, splice them in as is
+        sections_body = b",".join(
+            dumps(section) + b":" + bodies[section] for section in sorted(bodies)
+        )
+        body = b'{"sections":{' + sections_body + b'},"timings":' + dumps(timings) + b"}\n"
+        return with_etag(app.response_class(body, mimetype=app.json.mimetype), etag)
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -590,9 +1109,47 @@ def get_full_dataset(dataset_id: int):
                 "This user is not authorised to access this dataset"
             )
 
-        dataset_content = dataset_manager.get_dataset_content(dataset_id)
         filters = get_request_filters()
-        return jsonify(stat_gen.filter_dataset(dataset_content, filters)), 200
+        response_format = request.args.get("format") or (
+            "ndjson"
+            if request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+            == NDJSON_MIMETYPE
+            else "json"
+        )
+
+        if response_format not in ("json", "ndjson"):
+            return jsonify({"error": "Format must be json or ndjson"}), 400
+
+        after_id = request.args.get("after_id", type=int)
+        limit = request.args.get("limit", type=int)
+
+        # Unpaginated requests stream the whole dataset straight off the cursor
+        if after_id is None and limit is None:
+            rows = dataset_manager.iter_dataset_rows(dataset_id, filters)
+            if response_format == "ndjson":
+                body = iter_ndjson(rows)
+                mimetype = NDJSON_MIMETYPE
+            else:
+                body = iter_json_array(rows)
+                mimetype = app.json.mimetype
+
+            return app.response_class(stream_with_context(body), mimetype=mimetype), 200
+
+        if limit is not None and limit < 1:
+            return jsonify({"error": "Limit must be a positive integer"}), 400
+
+        limit = min(limit or default_export_page_size, max_export_page_size)
+
+        rows = dataset_manager.iter_dataset_rows(
+            dataset_id, filters, after_id=after_id, limit=limit
+        )
+
+        if response_format == "ndjson":
+            return app.response_class(
+                stream_with_context(iter_ndjson(rows)), mimetype=NDJSON_MIMETYPE
+            ), 200
+
+        return app.response_class(json_page(rows, limit), mimetype=app.json.mimetype), 200
     except NotAuthorisedException:
         return jsonify({"error": "User is not authorised to access this content"}), 403
     except NonExistentDatasetException:
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Callable
+
+import redis
+
+from server.core.filters import normalize_filters
+from server.core.serialization import dumps
+from server.utils import get_env
+
+logger = logging.getLogger(__name__)
+
+# Seconds an analysis result is kept, rewrites also invalidate explicitly
+result_cache_ttl = int(os.getenv("RESULT_CACHE_TTL", 24 * 60 * 60))
+
+RESULT_KEY_PREFIX = "crosspost:result"
+
+
+def filters_digest(filters: dict | None) -> str:
+    normalized = json.dumps(normalize_filters(filters), default=str)
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def analysis_key(analysis: str, options: dict | None = None) -> str:
+    """
+    Name an analysis result is cached and tagged under. Options that change
+    the result, like a graph reduction, get their own entry.
+    """
+    if not options:
+        return analysis
+
+    normalized = json.dumps(options, sort_keys=True, default=str)
+    return f"{analysis}:{hashlib.sha1(normalized.encode()).hexdigest()}"
+
+
+def _stamp_identity(stamp: dict) -> str:
+    # completed_at as well, appends change the content without a new version
+    completed_at = stamp["completed_at"].isoformat() if stamp["completed_at"] else ""
+    return f"{stamp['version']}:{completed_at}"
+
+
+def result_etag(
+    dataset_id: int, stamp: dict | None, analysis: str, filters: dict | None
+) -> str | None:
+    """
+    Strong ETag for an analysis of a dataset's content as identified by
+    DatasetManager.get_content_stamp. completed_at is part of it as appends
+    change the content without a new version. None while the dataset is
+    being written.
+    """
+    if stamp is None:
+        return None
+
+    identity = (
+        f"{dataset_id}:{_stamp_identity(stamp)}:{analysis}:{filters_digest(filters)}"
+    )
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Serialised StatGen results in Redis, keyed by dataset id, content stamp
+    (see result_etag), analysis name and filters. Redis failures are logged
+    and treated as misses, the cache never takes an endpoint down.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int = result_cache_ttl):
+        self.client = client
+        self.ttl = ttl
+
+    def key(self, dataset_id: int, stamp: dict, analysis: str, filters: dict | None) -> str:
+        return (
+            f"{RESULT_KEY_PREFIX}:{dataset_id}:{_stamp_identity(stamp)}:{analysis}:"
+            f"{filters_digest(filters)}"
+        )
+
+    def get(
+        self, dataset_id: int, stamp: dict, analysis: str, filters: dict | None
+    ) -> bytes | None:
+        try:
+            return self.client.get(self.key(dataset_id, stamp, analysis, filters))
+        except redis.RedisError as e:
+            logger.warning("Result cache read failed: %s", e)
+            return None
+
+    def set(
+        self,
+        dataset_id: int,
+        stamp: dict,
+        analysis: str,
+        filters: dict | None,
+        body: bytes,
+    ):
+        try:
+            self.client.set(
+                self.key(dataset_id, stamp, analysis, filters), body, ex=self.ttl
+            )
+        except redis.RedisError as e:
+            logger.warning("Result cache write failed: %s", e)
+
+    def get_or_compute(
+        self,
+        dataset_id: int,
+        stamp: dict | None,
+        analysis: str,
+        filters: dict | None,
+        compute: Callable[[], dict],
+    ) -> bytes:
+        """
+        Serialised result from the cache, or from compute() which is then
+        cached. A stamp of None means the dataset is still being written
+        and bypasses the cache.
+        """
+        if stamp is None:
+            return dumps(compute())
+
+        body = self.get(dataset_id, stamp, analysis, filters)
+        if body is None:
+            body = dumps(compute())
+            self.set(dataset_id, stamp, analysis, filters, body)
+
+        return body
+
+    def invalidate(self, dataset_id: int):
+        try:
+            keys = list(
+                self.client.scan_iter(f"{RESULT_KEY_PREFIX}:{dataset_id}:*", count=500)
+            )
+            if keys:
+                self.client.delete(*keys)
+        except redis.RedisError as e:
+            logger.warning("Result cache invalidation failed: %s", e)
+
+
+_result_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache:
+    global _result_cache
+
+    if _result_cache is None:
+        _result_cache = ResultCache(redis.Redis.from_url(get_env("REDIS_URL")))
+
+    return _result_cache
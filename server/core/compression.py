@@ -0,0 +1,190 @@
+import os
+import threading
+import zlib
+from typing import Iterable, Iterator
+
+from flask import Flask, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Responses smaller than this aren't worth the CPU or the extra headers
+compression_min_size = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+gzip_level = int(os.getenv("COMPRESSION_GZIP_LEVEL", 6))
+brotli_quality = int(os.getenv("COMPRESSION_BROTLI_QUALITY", 5))
+zstd_level = int(os.getenv("COMPRESSION_ZSTD_LEVEL", 3))
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/event-stream",
+    "text/plain",
+    "text/html",
+}
+
+
+class _Gzip:
+    def __init__(self):
+        self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=brotli_quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Server preference when the client rates several encodings equally
+ENCODERS = {
+    name: encoder
+    for name, encoder, available in [
+        ("zstd", _Zstd, zstandard is not None),
+        ("br", _Brotli, brotli is not None),
+        ("gzip", _Gzip, True),
+    ]
+    if available
+}
+
+
+class CompressionMetrics:
+    """Bytes before and after compression per endpoint, for /metrics."""
+
+    def __init__(self):
+        self._endpoints: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, original: int, compressed: int, responses: int = 0):
+        with self._lock:
+            counters = self._endpoints.setdefault(
+                endpoint, {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+            )
+            counters["responses"] += responses
+            counters["bytes_in"] += original
+            counters["bytes_out"] += compressed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    **counters,
+                    "bytes_saved": counters["bytes_in"] - counters["bytes_out"],
+                }
+                for endpoint, counters in self._endpoints.items()
+            }
+
+
+metrics = CompressionMetrics()
+
+
+def encoded_etags(etag: str) -> list[str]:
+    # Each encoding is its own representation, with its own strong ETag
+    return [etag, *(f"{etag}-{encoding}" for encoding in ENCODERS)]
+
+
+def _stream(chunks: Iterable[bytes], encoder, endpoint: str) -> Iterator[bytes]:
+    # Flushing after every chunk keeps NDJSON lines flowing to the client
+    # instead of sitting in the compressor's window
+    original = compressed = 0
+
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            if not chunk:
+                continue
+
+            data = encoder.compress(chunk) + encoder.flush()
+            original += len(chunk)
+            compressed += len(data)
+            yield data
+
+        data = encoder.finish()
+        compressed += len(data)
+        yield data
+    finally:
+        metrics.record(endpoint, original, compressed, responses=1)
+
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def compress_response(response):
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    encoding = request.accept_encodings.best_match(list(ENCODERS))
+    if encoding is None:
+        return response
+
+    endpoint = request.endpoint or "unknown"
+    encoder = ENCODERS[encoding]()
+
+    if response.is_streamed:
+        response.response = _stream(response.response, encoder, endpoint)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < compression_min_size:
+            return response
+
+        compressed = encoder.compress(data) + encoder.finish()
+        metrics.record(endpoint, len(data), len(compressed), responses=1)
+        response.set_data(compressed)
+
+    response.headers["Content-Encoding"] = encoding
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+
+    return response
+
+
+def init_compression(app: Flask):
+    app.after_request(compress_response)
@@ -1,20 +1,180 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator
+
 import pandas as pd
 from server.db.database import PostgresConnector
+from psycopg2 import sql
 from psycopg2.extras import Json
+from server.core.filters import build_filter_clause, normalize_filters
+from server.core.frame_cache import FrameCache
+from server.core.status import StatusPublisher
 from server.exceptions import NonExistentDatasetException
 
+logger = logging.getLogger(__name__)
+
+# Rows per chunk when streaming events out of Postgres
+dataset_chunk_size = int(os.getenv("DATASET_CHUNK_SIZE", 50_000))
+# Memory budget for loaded frames kept by the API process, see FrameCache
+dataset_cache_max_bytes = int(os.getenv("DATASET_CACHE_MAX_BYTES", 512 * 1024**2))
+# Seconds a dataset's owner is remembered, saves the lookup on repeat requests
+dataset_owner_cache_ttl = float(os.getenv("DATASET_OWNER_CACHE_TTL", 60))
+# Most recently used dataset owners remembered at once
+dataset_owner_cache_size = int(os.getenv("DATASET_OWNER_CACHE_SIZE", 10_000))
+
+# How long partition changes wait for a lock before giving up, rather
+# than queueing behind long reads and blocking every query behind them
+PARTITION_LOCK_TIMEOUT = "2s"
+
+# The datasets row minus what no hot path reads, see get_dataset_context
+DATASET_CONTEXT_COLUMNS = [
+    "id",
+    "user_id",
+    "name",
+    "created_at",
+    "topics",
+    "lexicons",
+    "status",
+    "status_message",
+    "completed_at",
+    "current_version",
+]
+
+EVENT_COLUMNS = [
+    "dataset_id",
+    "post_id",
+    "type",
+    "parent_id",
+    "author",
+    "title",
+    "content",
+    "timestamp",
+    "date",
+    "dt",
+    "hour",
+    "weekday",
+    "reply_to",
+    "source",
+    "topic",
+    "topic_confidence",
+    "ner_entities",
+    "emotion_anger",
+    "emotion_disgust",
+    "emotion_fear",
+    "emotion_joy",
+    "emotion_sadness",
+]
+
+# Identifies an event within its dataset, see migration 0003
+EVENT_KEY_COLUMNS = ["dataset_id", "source", "type", "post_id"]
+
+
+def event_fingerprints(event_data: pd.DataFrame) -> pd.Series:
+    """
+    md5 of title and content, computed the same way as the fingerprint
+    column from DatasetManager.get_event_fingerprints.
+    """
+    titles = (
+        event_data["title"]
+        if "title" in event_data.columns
+        else pd.Series(None, index=event_data.index, dtype=object)
+    )
+
+    return pd.Series(
+        [
+            hashlib.md5(
+                f"{title if isinstance(title, str) else ''}\x1f{content}".encode()
+            ).hexdigest()
+            for title, content in zip(titles, event_data["content"])
+        ],
+        index=event_data.index,
+    )
+
 
 class DatasetManager:
-    def __init__(self, db: PostgresConnector):
+    def __init__(
+        self,
+        db: PostgresConnector,
+        frame_cache: FrameCache | None = None,
+        status_publisher: StatusPublisher | None = None,
+        context_store: Callable[[], dict | None] | None = None,
+    ):
         self.db = db
+        self.frame_cache = frame_cache
+        self.status_publisher = status_publisher
+        self.context_store = context_store
+
+        self._owners: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self._owners_lock = threading.Lock()
+
+    def get_dataset_context(self, dataset_id: int) -> dict:
+        """
+        Ownership, name, topics, status and version of a dataset in one
+        narrow query. With a context_store the row is fetched at most once
+        per store, i.e. once per request in the API, and writes through this
+        manager drop it again.
+        """
+        store = self.context_store() if self.context_store else None
+        if store is not None and dataset_id in store:
+            return store[dataset_id]
+
+        query = sql.SQL("SELECT {} FROM datasets WHERE id = %s").format(
+            sql.SQL(", ").join(map(sql.Identifier, DATASET_CONTEXT_COLUMNS))
+        )
+        result = self.db.execute(query, (dataset_id,), fetch=True)
+
+        if not result:
+            raise NonExistentDatasetException(f"Dataset {dataset_id} does not exist")
+
+        context = dict(result[0])
+        self._remember_owner(dataset_id, context["user_id"])
+
+        if store is not None:
+            store[dataset_id] = context
+
+        return context
+
+    def _forget_context(self, dataset_id: int):
+        store = self.context_store() if self.context_store else None
+        if store is not None:
+            store.pop(dataset_id, None)
+
+    def _remember_owner(self, dataset_id: int, user_id: int):
+        with self._owners_lock:
+            self._owners[dataset_id] = (user_id, time.monotonic() + dataset_owner_cache_ttl)
+            self._owners.move_to_end(dataset_id)
+            while len(self._owners) > dataset_owner_cache_size:
+                self._owners.popitem(last=False)
+
+    def _cached_owner(self, dataset_id: int) -> int | None:
+        with self._owners_lock:
+            owner = self._owners.get(dataset_id)
+
+            if owner is None:
+                return None
+
+            if owner[1] < time.monotonic():
+                del self._owners[dataset_id]
+                return None
+
+            self._owners.move_to_end(dataset_id)
+            return owner[0]
 
     def authorize_user_dataset(self, dataset_id: int, user_id: int) -> bool:
-        dataset_info = self.get_dataset_info(dataset_id)
+        owner = self._cached_owner(dataset_id)
+        if owner is None:
+            owner = self.get_dataset_context(dataset_id)["user_id"]
 
-        if dataset_info.get("user_id", None) == None:
+        if owner == None:
             return False
 
-        if dataset_info.get("user_id") != user_id:
+        if owner != user_id:
             return False
 
         return True
@@ -23,37 +183,172 @@ class DatasetManager:
         query = "SELECT * FROM datasets WHERE user_id = %s"
         return self.db.execute(query, (user_id,), fetch=True)
 
-    def get_dataset_content(self, dataset_id: int) -> pd.DataFrame:
-        query = "SELECT * FROM events WHERE dataset_id = %s"
-        result = self.db.execute(query, (dataset_id,), fetch=True)
-        df = pd.DataFrame(result)
-        if df.empty:
-            return df
-
-        dedupe_columns = [
-            column
-            for column in [
-                "post_id",
-                "parent_id",
-                "reply_to",
-                "author",
-                "type",
-                "timestamp",
-                "dt",
-                "title",
-                "content",
-                "source",
-                "topic",
-            ]
-            if column in df.columns
+    def _content_query(
+        self, dataset_id: int, filters: dict | None, columns: list[str]
+    ) -> tuple[sql.Composable, list]:
+        unknown_columns = set(columns) - {"id", *EVENT_COLUMNS}
+        if unknown_columns:
+            raise ValueError(f"Unknown event columns: {sorted(unknown_columns)}")
+
+        query = sql.SQL(
+            """
+            SELECT {} FROM events
+            WHERE dataset_id = %s
+              AND version = (SELECT current_version FROM datasets WHERE id = %s)
+            """
+        ).format(sql.SQL(", ").join(map(sql.Identifier, columns)))
+        params = [dataset_id, dataset_id]
+
+        if filters is not None:
+            filter_clause, filter_params = build_filter_clause(filters)
+            query = sql.SQL("{} AND {}").format(query, sql.SQL(filter_clause))
+            params.extend(filter_params)
+
+        return query, params
+
+    def iter_dataset_rows(
+        self,
+        dataset_id: int,
+        filters: dict | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+        chunk_size: int = dataset_chunk_size,
+    ) -> Iterator[tuple[list[str], list[tuple]]]:
+        """
+        Stream a dataset's events as raw (columns, rows) chunks in id order,
+        for exports that never need a DataFrame. after_id and limit page
+        through the events by keyset rather than OFFSET, so every page costs
+        the same however deep it is.
+        """
+        query, params = self._content_query(dataset_id, filters, ["id", *EVENT_COLUMNS])
+
+        if after_id is not None:
+            query = sql.SQL("{} AND id > %s").format(query)
+            params.append(after_id)
+
+        query = sql.SQL("{} ORDER BY id").format(query)
+
+        if limit is not None:
+            query = sql.SQL("{} LIMIT %s").format(query)
+            params.append(limit)
+
+        yield from self.db.stream(query, params, chunk_size=chunk_size)
+
+    def iter_dataset_content(
+        self,
+        dataset_id: int,
+        filters: dict | None = None,
+        columns: list[str] | None = None,
+        chunk_size: int = dataset_chunk_size,
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Stream a dataset's events as DataFrames of at most chunk_size rows,
+        read through a server-side cursor so memory stays bounded.
+        """
+        selected_columns = columns or ["id", *EVENT_COLUMNS]
+
+        # Serve a cached frame if there is one, but never fill the cache from
+        # here, streaming callers rely on memory staying bounded
+        stamp = self._content_stamp(dataset_id)
+        if stamp is not None:
+            cached = self.frame_cache.get(
+                dataset_id, stamp, normalize_filters(filters), selected_columns
+            )
+            if cached is not None:
+                yield cached
+                return
+
+        query, params = self._content_query(dataset_id, filters, selected_columns)
+
+        for names, rows in self.db.stream(query, params, chunk_size=chunk_size):
+            chunk = pd.DataFrame.from_records(rows, columns=names)
+            chunk.attrs["prefiltered"] = filters is not None
+            yield chunk
+
+    def get_dataset_content(
+        self,
+        dataset_id: int,
+        filters: dict | None = None,
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        Load a dataset's events. When filters are given they are applied in
+        SQL and the frame is marked as prefiltered, so StatGen skips its
+        pandas filtering pass. columns restricts the load to a projection.
+
+        Events are unique per (dataset_id, source, type, post_id) since
+        ingest, so no deduplication happens here. Rows come in id order, so
+        loads of different projections line up row for row.
+        """
+        selected_columns = columns or ["id", *EVENT_COLUMNS]
+        filters_key = normalize_filters(filters)
+
+        stamp = self._content_stamp(dataset_id)
+        if stamp is not None:
+            cached = self.frame_cache.get(dataset_id, stamp, filters_key, selected_columns)
+            if cached is not None:
+                return cached
+
+        query, params = self._content_query(dataset_id, filters, selected_columns)
+        query = sql.SQL("{} ORDER BY id").format(query)
+        chunks = [
+            pd.DataFrame.from_records(rows, columns=names)
+            for names, rows in self.db.stream(query, params)
         ]
 
-        if dedupe_columns:
-            df = df.drop_duplicates(subset=dedupe_columns, keep="first")
+        if chunks:
+            df = pd.concat(chunks, ignore_index=True)
         else:
-            df = df.drop_duplicates(keep="first")
+            df = pd.DataFrame(columns=selected_columns)
+
+        del chunks
+        df.attrs["prefiltered"] = filters is not None
+
+        if stamp is not None:
+            self.frame_cache.put(dataset_id, stamp, filters_key, selected_columns, df)
+
+        return df
+
+    def get_content_stamp(self, dataset_id: int) -> dict | None:
+        """
+        current_version and completed_at of a complete dataset, which
+        together identify its stored content. None while the dataset is
+        still being written, or doesn't exist, as nothing should be cached.
+        """
+        try:
+            context = self.get_dataset_context(dataset_id)
+        except NonExistentDatasetException:
+            return None
+
+        if context["status"] != "complete":
+            return None
 
-        return df.reset_index(drop=True)
+        return {
+            "version": context["current_version"],
+            "completed_at": context["completed_at"],
+        }
+
+    def _content_stamp(self, dataset_id: int) -> tuple | None:
+        if self.frame_cache is None:
+            return None
+
+        stamp = self.get_content_stamp(dataset_id)
+        if stamp is None:
+            return None
+
+        return stamp["version"], stamp["completed_at"]
+
+    def invalidate_cache(self, dataset_id: int):
+        self._forget_context(dataset_id)
+
+        if self.frame_cache is not None:
+            self.frame_cache.invalidate(dataset_id)
+
+    def cache_stats(self) -> dict | None:
+        if self.frame_cache is None:
+            return None
+
+        return self.frame_cache.stats()
 
     def get_dataset_info(self, dataset_id: int) -> dict:
         query = "SELECT * FROM datasets WHERE id = %s"
@@ -70,91 +365,484 @@ class DatasetManager:
             VALUES (%s, %s, %s)
             RETURNING id
         """
-        result = self.db.execute(
-            query, (user_id, dataset_name, Json(topics)), fetch=True
+
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, (user_id, dataset_name, Json(topics)))
+                dataset_id = cursor.fetchone()[0]
+                self._create_partition(cursor, dataset_id)
+
+        return dataset_id
+
+    # Partition lifecycle. Every dataset's events live in events_<dataset_id>,
+    # which is partitioned by version into events_<dataset_id>_v<version>.
+    def _partition_name(self, dataset_id: int) -> sql.Identifier:
+        return sql.Identifier(f"events_{int(dataset_id)}")
+
+    def _version_name(self, dataset_id: int, version: int) -> sql.Identifier:
+        return sql.Identifier(f"events_{int(dataset_id)}_v{int(version)}")
+
+    def _is_attached(self, cursor, parent: str, child: str) -> bool:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_inherits
+            WHERE inhparent = to_regclass(%s)
+              AND inhrelid = to_regclass(%s)
+            """,
+            (parent, child),
+        )
+        return cursor.fetchone() is not None
+
+    def _partition_exists(self, cursor, dataset_id: int) -> bool:
+        return self._is_attached(cursor, "events", f"events_{int(dataset_id)}")
+
+    def _attach_new_table(
+        self,
+        cursor,
+        parent: sql.Identifier,
+        table: sql.Identifier,
+        value: int,
+        partition_by: sql.Composable = sql.SQL(""),
+    ):
+        # Built standalone and then attached. ATTACH PARTITION only takes a
+        # SHARE UPDATE EXCLUSIVE lock on the parent, where CREATE TABLE ...
+        # PARTITION OF takes ACCESS EXCLUSIVE and queues behind every open
+        # read. A leftover of the same name was never attached or was
+        # detached by a delete, so holds nothing readable.
+        cursor.execute(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+        cursor.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(table))
+        cursor.execute(
+            sql.SQL(
+                "CREATE TABLE {} (LIKE events INCLUDING DEFAULTS INCLUDING INDEXES) {}"
+            ).format(table, partition_by)
+        )
+        cursor.execute(
+            sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})").format(
+                parent, table, sql.Literal(int(value))
+            )
         )
-        return result[0]["id"] if result else None
 
-    def save_dataset_content(self, dataset_id: int, event_data: pd.DataFrame):
-        if event_data.empty:
-            return
+    def _create_partition(self, cursor, dataset_id: int, version: int = 0):
+        """
+        Create events_<dataset_id> and its partition for version, unless they
+        exist. Callers lock the datasets row first, see delete_dataset_info.
+        """
+        if not self._partition_exists(cursor, dataset_id):
+            self._attach_new_table(
+                cursor,
+                sql.Identifier("events"),
+                self._partition_name(dataset_id),
+                dataset_id,
+                sql.SQL("PARTITION BY LIST (version)"),
+            )
 
-        dedupe_columns = [
-            column for column in ["id", "type", "source"] if column in event_data.columns
-        ]
-        if dedupe_columns:
-            event_data = event_data.drop_duplicates(subset=dedupe_columns, keep="first")
+        version_name = f"events_{int(dataset_id)}_v{int(version)}"
+        if not self._is_attached(cursor, f"events_{int(dataset_id)}", version_name):
+            self._attach_new_table(
+                cursor,
+                self._partition_name(dataset_id),
+                self._version_name(dataset_id, version),
+                version,
+            )
+
+    def _detach_partition(self, dataset_id: int):
+        """
+        Detach events_<dataset_id> from events without blocking readers of
+        other datasets. DETACH PARTITION CONCURRENTLY can't run in a
+        transaction, so this commits on its own and the caller drops the
+        table afterwards.
+        """
+        name = f"events_{int(dataset_id)}"
+
+        with self.db.autocommit_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(f"SET lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+                try:
+                    cursor.execute(
+                        """
+                        SELECT inhdetachpending
+                        FROM pg_inherits
+                        WHERE inhparent = 'events'::regclass
+                          AND inhrelid = to_regclass(%s)
+                        """,
+                        (name,),
+                    )
+                    result = cursor.fetchone()
+                    if result is None:
+                        return
+
+                    # A detach interrupted earlier can only be finalized
+                    mode = "FINALIZE" if result[0] else "CONCURRENTLY"
+                    cursor.execute(
+                        sql.SQL("ALTER TABLE events DETACH PARTITION {} {}").format(
+                            sql.Identifier(name), sql.SQL(mode)
+                        )
+                    )
+                finally:
+                    cursor.execute("RESET lock_timeout")
+
+    def _drop_partition(self, cursor, dataset_id: int):
+        # Detached by _detach_partition, drops every version with it
+        cursor.execute(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+        cursor.execute(
+            sql.SQL("DROP TABLE IF EXISTS {}").format(self._partition_name(dataset_id))
+        )
+
+    def _current_version(self, cursor, dataset_id: int, lock: bool = False) -> int:
+        query = "SELECT current_version FROM datasets WHERE id = %s"
+        if lock:
+            query += " FOR UPDATE"
+
+        cursor.execute(query, (dataset_id,))
+        result = cursor.fetchone()
+
+        if not result:
+            raise NonExistentDatasetException(f"Dataset {dataset_id} does not exist")
+
+        return result[0]
+
+    def _next_version(self, cursor, dataset_id: int) -> int:
+        """
+        Lock the datasets row and allocate a version past the current one and
+        every version table on disk, so concurrent loads never build the same
+        table. Versions left by failed loads leave a gap.
+        """
+        version = self._current_version(cursor, dataset_id, lock=True)
+
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND relname ~ %s",
+            (f"^events_{int(dataset_id)}_v\\d+$",),
+        )
+        for (name,) in cursor.fetchall():
+            version = max(version, int(name.rsplit("_v", 1)[1]))
+
+        return version + 1
+
+    def get_dataset_version(self, dataset_id: int) -> int:
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                return self._current_version(cursor, dataset_id)
+
+    def drop_stale_versions(self, dataset_id: int) -> list[int]:
+        """
+        Detach and drop every version of a dataset older than its current
+        one. Run in the background a while after a reload, so requests that
+        started on the old version can finish reading it.
+        """
+        dropped = []
+
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                # Never queue behind long reads and block the dataset for others
+                cursor.execute(f"SET LOCAL lock_timeout = '{PARTITION_LOCK_TIMEOUT}'")
+
+                try:
+                    current_version = self._current_version(cursor, dataset_id)
+                except NonExistentDatasetException:
+                    return dropped
+
+                cursor.execute(
+                    """
+                    SELECT c.relname, i.inhparent IS NOT NULL AS attached
+                    FROM pg_class c
+                    LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+                    WHERE c.relkind = 'r' AND c.relname ~ %s
+                    """,
+                    (f"^events_{int(dataset_id)}_v\\d+$",),
+                )
+
+                for name, attached in cursor.fetchall():
+                    version = int(name.rsplit("_v", 1)[1])
+
+                    # Newer unattached versions belong to a load in progress
+                    if version >= current_version:
+                        continue
+
+                    if attached:
+                        cursor.execute(
+                            sql.SQL("ALTER TABLE {} DETACH PARTITION {}").format(
+                                self._partition_name(dataset_id), sql.Identifier(name)
+                            )
+                        )
+                    cursor.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+                    dropped.append(version)
+
+        return sorted(dropped)
+
+    def _copy_column(self, values: pd.Series) -> pd.Series:
+        """
+        Render one column in COPY text format: tab/newline/backslash escaped,
+        with missing values written as \\N so they load as NULL.
+        """
+        text = (
+            values.astype(str)
+            .str.replace("\\", "\\\\", regex=False)
+            .str.replace("\t", "\\t", regex=False)
+            .str.replace("\n", "\\n", regex=False)
+            .str.replace("\r", "\\r", regex=False)
+        )
+
+        return text.mask(values.isna(), "\\N")
+
+    def _events_copy_buffer(self, dataset_id: int, event_data: pd.DataFrame) -> io.StringIO:
+        # posts and comments are concatenated upstream, so the index repeats
+        event_data = event_data.reset_index(drop=True)
+
+        def optional(column: str) -> pd.Series:
+            if column in event_data.columns:
+                return event_data[column]
+            return pd.Series(None, index=event_data.index, dtype=object)
+
+        def integer(values: pd.Series) -> pd.Series:
+            return pd.to_numeric(values).round().astype("Int64")
+
+        entities = optional("entities").map(
+            lambda e: json.dumps(e) if isinstance(e, (list, dict)) else None
+        )
+
+        columns = {
+            "dataset_id": pd.Series(dataset_id, index=event_data.index),
+            "post_id": event_data["id"],
+            "type": event_data["type"],
+            "parent_id": event_data["parent_id"],
+            "author": event_data["author"],
+            "title": optional("title"),
+            "content": event_data["content"],
+            "timestamp": integer(event_data["timestamp"]),
+            "date": event_data["date"],
+            "dt": event_data["dt"],
+            "hour": integer(event_data["hour"]),
+            "weekday": event_data["weekday"],
+            "reply_to": optional("reply_to"),
+            "source": event_data["source"],
+            "topic": optional("topic"),
+            "topic_confidence": optional("topic_confidence"),
+            "ner_entities": entities,
+            "emotion_anger": optional("emotion_anger"),
+            "emotion_disgust": optional("emotion_disgust"),
+            "emotion_fear": optional("emotion_fear"),
+            "emotion_joy": optional("emotion_joy"),
+            "emotion_sadness": optional("emotion_sadness"),
+        }
+        rendered = [self._copy_column(columns[name]) for name in EVENT_COLUMNS]
+        lines = rendered[0].str.cat(rendered[1:], sep="\t")
+
+        buffer = io.StringIO()
+        buffer.write("\n".join(lines))
+        buffer.write("\n")
+        buffer.seek(0)
+        return buffer
+
+    def _load_events(
+        self,
+        cursor,
+        target: sql.Identifier,
+        buffer: io.StringIO,
+        version: int,
+        update_existing: bool = False,
+    ) -> int:
+        """
+        COPY a buffer from _events_copy_buffer into a temporary table, then
+        insert it into target as the given dataset version. Within the
+        buffer the first occurrence of each (dataset_id, source, type,
+        post_id) wins. Rows already in target are left alone, or
+        overwritten when update_existing is set.
+        """
+        columns = sql.SQL(", ").join(map(sql.Identifier, EVENT_COLUMNS))
+
+        if update_existing:
+            conflict_action = sql.SQL("DO UPDATE SET {}").format(
+                sql.SQL(", ").join(
+                    sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(column))
+                    for column in EVENT_COLUMNS
+                    if column not in EVENT_KEY_COLUMNS
+                )
+            )
         else:
-            event_data = event_data.drop_duplicates(keep="first")
+            conflict_action = sql.SQL("DO NOTHING")
+
+        cursor.execute(
+            """
+            CREATE TEMP TABLE events_load (LIKE events INCLUDING DEFAULTS)
+            ON COMMIT DROP
+            """
+        )
+        cursor.copy_expert(
+            sql.SQL("COPY events_load ({}) FROM STDIN").format(columns), buffer
+        )
+        cursor.execute(
+            sql.SQL(
+                """
+                INSERT INTO {target} (id, version, {columns})
+                SELECT DISTINCT ON (dataset_id, source, type, post_id)
+                    id, {version}, {columns}
+                FROM events_load
+                ORDER BY dataset_id, source, type, post_id, id
+                ON CONFLICT (dataset_id, version, source, type, post_id)
+                {conflict_action}
+                """
+            ).format(
+                target=target,
+                columns=columns,
+                version=sql.Literal(int(version)),
+                conflict_action=conflict_action,
+            )
+        )
+        rows = cursor.rowcount
+        cursor.execute("DROP TABLE events_load")
 
-        self.delete_dataset_content(dataset_id)
+        return rows
 
+    def get_event_fingerprints(self, dataset_id: int) -> pd.DataFrame:
+        """
+        Key and content fingerprint of every stored event, used to find which
+        incoming events are new or changed. Matches event_fingerprints().
+        """
         query = """
-            INSERT INTO events (
-                dataset_id,
+            SELECT
                 post_id,
                 type,
-                parent_id,
-                author,
-                title,
-                content,
-                timestamp,
-                date,
-                dt,
-                hour,
-                weekday,
-                reply_to,
                 source,
-                topic,
-                topic_confidence,
-                ner_entities,
-                emotion_anger,
-                emotion_disgust,
-                emotion_fear,
-                emotion_joy,
-                emotion_sadness
-            )
-            VALUES (
-                %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
-                %s, %s, %s, %s, %s,
-                %s, %s
-            )
+                md5(coalesce(title, '') || chr(31) || content) AS fingerprint
+            FROM events
+            WHERE dataset_id = %s
+              AND version = (SELECT current_version FROM datasets WHERE id = %s)
         """
+        result = self.db.execute(query, (dataset_id, dataset_id), fetch=True)
+        return pd.DataFrame(result, columns=["post_id", "type", "source", "fingerprint"])
 
-        values = [
-            (
-                dataset_id,
-                row["id"],
-                row["type"],
-                row["parent_id"],
-                row["author"],
-                row.get("title"),
-                row["content"],
-                row["timestamp"],
-                row["date"],
-                row["dt"],
-                row["hour"],
-                row["weekday"],
-                row.get("reply_to"),
-                row["source"],
-                row.get("topic"),
-                row.get("topic_confidence"),
-                Json(row["entities"]) if row.get("entities") is not None else None,
-                row.get("emotion_anger"),
-                row.get("emotion_disgust"),
-                row.get("emotion_fear"),
-                row.get("emotion_joy"),
-                row.get("emotion_sadness"),
-            )
-            for _, row in event_data.iterrows()
-        ]
+    def upsert_dataset_content(self, dataset_id: int, event_data: pd.DataFrame) -> int:
+        """
+        Append mode: insert new events and overwrite changed ones in place,
+        leaving the rest of the dataset untouched.
+        """
+        if event_data.empty:
+            return 0
+
+        start = time.perf_counter()
+        buffer = self._events_copy_buffer(dataset_id, event_data)
+
+        # Locking the dataset row serialises this with a concurrent version flip
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                version = self._current_version(cursor, dataset_id, lock=True)
+                self._create_partition(cursor, dataset_id, version)
+                rows = self._load_events(
+                    cursor,
+                    sql.Identifier("events"),
+                    buffer,
+                    version,
+                    update_existing=True,
+                )
+
+        self.invalidate_cache(dataset_id)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Upserted %d events into dataset %d in %.2fs (%.0f rows/s)",
+            rows,
+            dataset_id,
+            elapsed,
+            rows / max(elapsed, 1e-9),
+        )
+
+        return rows
 
-        self.db.execute_batch(query, values)
+    def save_dataset_content(self, dataset_id: int, event_data: pd.DataFrame) -> int:
+        if event_data.empty:
+            return 0
+
+        start = time.perf_counter()
+        buffer = self._events_copy_buffer(dataset_id, event_data)
+
+        # The next version is built as a standalone table shaped like a
+        # partition. Its CHECK constraint and FK let ATTACH PARTITION skip
+        # validation scans.
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                version = self._next_version(cursor, dataset_id)
+                staging = self._version_name(dataset_id, version)
+
+                cursor.execute(
+                    sql.SQL(
+                        "CREATE TABLE {} (LIKE events INCLUDING DEFAULTS INCLUDING INDEXES)"
+                    ).format(staging)
+                )
+                cursor.execute(
+                    sql.SQL(
+                        """
+                        ALTER TABLE {staging}
+                            ADD CHECK (dataset_id = {dataset_id} AND version = {version}),
+                            ADD FOREIGN KEY (dataset_id)
+                                REFERENCES datasets(id) ON DELETE CASCADE
+                        """
+                    ).format(
+                        staging=staging,
+                        dataset_id=sql.Literal(int(dataset_id)),
+                        version=sql.Literal(int(version)),
+                    )
+                )
+
+        # Load the new version, attach it and flip current_version in one
+        # transaction. Readers keep reading the previous version until the
+        # commit and a failed load leaves it in place. Attaching only takes a
+        # SHARE UPDATE EXCLUSIVE lock, so it doesn't block readers either.
+        # The datasets row is locked first, so appends wait for the flip and
+        # then write to the new version instead of one about to be replaced.
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                current_version = self._current_version(cursor, dataset_id, lock=True)
+
+                # A load started later already replaced this one's content,
+                # or the content was deleted meanwhile
+                if current_version >= version:
+                    raise RuntimeError(
+                        f"Dataset {dataset_id} changed while version {version} was being saved"
+                    )
+
+                rows = self._load_events(cursor, staging, buffer, version)
+
+                if not self._partition_exists(cursor, dataset_id):
+                    self._attach_new_table(
+                        cursor,
+                        sql.Identifier("events"),
+                        self._partition_name(dataset_id),
+                        dataset_id,
+                        sql.SQL("PARTITION BY LIST (version)"),
+                    )
+
+                cursor.execute(
+                    sql.SQL("ALTER TABLE {} ATTACH PARTITION {} FOR VALUES IN ({})").format(
+                        self._partition_name(dataset_id),
+                        staging,
+                        sql.Literal(int(version)),
+                    )
+                )
+                cursor.execute(
+                    "UPDATE datasets SET current_version = %s WHERE id = %s",
+                    (version, dataset_id),
+                )
+
+        self.invalidate_cache(dataset_id)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "Saved %d events for dataset %d in %.2fs (%.0f rows/s)",
+            rows,
+            dataset_id,
+            elapsed,
+            rows / max(elapsed, 1e-9),
+        )
+
+        return rows
 
     def set_dataset_status(
-        self, dataset_id: int, status: str, status_message: str | None = None
+        self,
+        dataset_id: int,
+        status: str,
+        status_message: str | None = None,
+        progress: float | None = None,
     ):
         if status not in ["fetching", "processing", "complete", "error"]:
             raise ValueError("Invalid status")
@@ -171,32 +859,69 @@ class DatasetManager:
         """
 
         self.db.execute(query, (status, status_message, status, dataset_id))
+        self.invalidate_cache(dataset_id)
 
-    def get_dataset_status(self, dataset_id: int):
-        query = """
-            SELECT status, status_message, completed_at
-            FROM datasets
-            WHERE id = %s
-        """
-
-        result = self.db.execute(query, (dataset_id,), fetch=True)
-
-        if not result:
-            print(result)
-            raise NonExistentDatasetException(f"Dataset {dataset_id} does not exist")
+        if self.status_publisher is not None:
+            self.status_publisher.publish(dataset_id, status, status_message, progress)
 
-        return result[0]
+    def get_dataset_status(self, dataset_id: int):
+        context = self.get_dataset_context(dataset_id)
+        return {
+            column: context[column]
+            for column in ("status", "status_message", "completed_at")
+        }
 
     def update_dataset_name(self, dataset_id: int, new_name: str):
         query = "UPDATE datasets SET name = %s WHERE id = %s"
         self.db.execute(query, (new_name, dataset_id))
+        self._forget_context(dataset_id)
+
+    def get_dataset_lexicons(self, dataset_id: int) -> dict:
+        return self.get_dataset_context(dataset_id)["lexicons"] or {}
+
+    def update_dataset_lexicons(self, dataset_id: int, lexicons: dict):
+        # Results are cached per lexicon, so nothing else needs invalidating
+        query = "UPDATE datasets SET lexicons = %s WHERE id = %s"
+        self.db.execute(query, (Json(lexicons) if lexicons else None, dataset_id))
+        self._forget_context(dataset_id)
 
     def delete_dataset_info(self, dataset_id: int):
         query = "DELETE FROM datasets WHERE id = %s"
 
-        self.db.execute(query, (dataset_id,))
+        # Detach and drop the partition first so the cascade has no rows left
+        # to delete. The datasets row is locked before the partition's table,
+        # in the same order as upsert_dataset_content, so the two can't
+        # deadlock.
+        self._detach_partition(dataset_id)
 
-    def delete_dataset_content(self, dataset_id: int):
-        query = "DELETE FROM events WHERE dataset_id = %s"
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM datasets WHERE id = %s FOR UPDATE", (dataset_id,))
+                self._drop_partition(cursor, dataset_id)
+                cursor.execute(query, (dataset_id,))
+
+        with self._owners_lock:
+            self._owners.pop(dataset_id, None)
 
-        self.db.execute(query, (dataset_id,))
+        self.invalidate_cache(dataset_id)
+
+    def delete_dataset_content(self, dataset_id: int):
+        # Dropping and recreating the partition is O(1), unlike a row delete.
+        # The version moves on so anything keyed by it sees the change.
+        self.invalidate_cache(dataset_id)
+
+        self._detach_partition(dataset_id)
+
+        with self.db.connection() as connection:
+            with connection.cursor() as cursor:
+                try:
+                    version = self._next_version(cursor, dataset_id)
+                except NonExistentDatasetException:
+                    return
+
+                self._drop_partition(cursor, dataset_id)
+                self._create_partition(cursor, dataset_id, version)
+                cursor.execute(
+                    "UPDATE datasets SET current_version = %s WHERE id = %s",
+                    (version, dataset_id),
+                )
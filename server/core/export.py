@@ -0,0 +1,54 @@
+from typing import Iterable, Iterator
+
+import orjson
+
+from server.core.serialization import dumps
+
+# Event timestamps are whole seconds, exported without a fractional part
+RECORD_OPTIONS = orjson.OPT_OMIT_MICROSECONDS
+
+
+def _records(chunks: Iterable[tuple[list[str], list[tuple]]]) -> Iterator[tuple[int, str]]:
+    # (id, serialised event) per row, chunks as yielded by DatasetManager.iter_dataset_rows
+    for columns, rows in chunks:
+        id_index = columns.index("id")
+        for row in rows:
+            record = dumps(dict(zip(columns, row)), option=RECORD_OPTIONS).decode()
+            yield row[id_index], record
+
+
+def iter_ndjson(chunks: Iterable[tuple[list[str], list[tuple]]]) -> Iterator[str]:
+    """One event per line, as rows come off the cursor."""
+    for columns, rows in chunks:
+        yield "".join(f"{record}\n" for _, record in _records([(columns, rows)]))
+
+
+def iter_json_array(chunks: Iterable[tuple[list[str], list[tuple]]]) -> Iterator[str]:
+    """A single JSON array of events, streamed a cursor chunk at a time."""
+    yield "["
+    separator = ""
+
+    for columns, rows in chunks:
+        if not rows:
+            continue
+
+        yield separator + ",".join(record for _, record in _records([(columns, rows)]))
+        separator = ","
+
+    yield "]\n"
+
+
+def json_page(chunks: Iterable[tuple[list[str], list[tuple]]], limit: int) -> str:
+    """
+    One keyset page of events. next_after_id is the cursor for the next
+    page, or null once the last page has been returned.
+    """
+    records = []
+    last_id = None
+
+    for event_id, record in _records(chunks):
+        records.append(record)
+        last_id = event_id
+
+    next_after_id = dumps(last_id if len(records) == limit else None).decode()
+    return f'{{"events":[{",".join(records)}],"next_after_id":{next_after_id}}}\n'
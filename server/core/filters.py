@@ -0,0 +1,61 @@
+EXCLUDED_AUTHORS = {"[deleted]", "automoderator"}
+
+
+def _like_pattern(value: str) -> str:
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def build_filter_clause(filters: dict | None = None) -> tuple[str, list]:
+    """
+    Translate the filters from server.utils.get_request_filters into a
+    parameterised WHERE fragment over events, mirroring
+    StatGen._prepare_filtered_df. Excluded authors are always filtered out.
+
+    search_query is matched as a case-insensitive substring; unlike the
+    pandas fallback it is never treated as a regular expression.
+    """
+    filters = filters or {}
+
+    clauses = ["lower(btrim(author)) <> ALL(%s)"]
+    params: list = [sorted(EXCLUDED_AUTHORS)]
+
+    search_query = filters.get("search_query", None)
+    start_date_filter = filters.get("start_date", None)
+    end_date_filter = filters.get("end_date", None)
+    data_source_filter = filters.get("data_sources", None)
+
+    if search_query:
+        pattern = _like_pattern(search_query)
+        clauses.append("(content ILIKE %s OR author ILIKE %s OR title ILIKE %s)")
+        params.extend([pattern, pattern, pattern])
+
+    if start_date_filter:
+        clauses.append("dt >= %s")
+        params.append(start_date_filter)
+
+    if end_date_filter:
+        clauses.append("dt <= %s")
+        params.append(end_date_filter)
+
+    if data_source_filter:
+        clauses.append("source = ANY(%s)")
+        params.append(list(data_source_filter))
+
+    return " AND ".join(clauses), params
+
+
+def normalize_filters(filters: dict | None):
+    """
+    Hashable, order-independent form of a filters dict, for cache keys. None
+    (no filtering at all) is kept distinct from an empty dict.
+    """
+    if filters is None:
+        return None
+
+    return tuple(
+        sorted(
+            (key, tuple(sorted(value)) if isinstance(value, (list, tuple, set)) else value)
+            for key, value in filters.items()
+        )
+    )
@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def frame_nbytes(df: pd.DataFrame) -> int:
+    # deep=True counts the Python objects behind object columns (strings,
+    # entity lists), which make up most of an events frame
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FrameCache:
+    """
+    Memory-bounded LRU cache of loaded dataset frames, local to the process.
+
+    Entries are keyed by (dataset_id, stamp, filters, columns), where stamp
+    identifies the stored content, so a reload from another process (the
+    Celery worker) simply stops matching old entries, which then age out.
+    A request for a subset of a cached entry's columns is served from it.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[tuple, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(
+        self, dataset_id: int, stamp, filters, columns: list[str]
+    ) -> pd.DataFrame | None:
+        wanted = set(columns)
+
+        with self._lock:
+            for key, (df, _) in reversed(self._entries.items()):
+                cached_id, cached_stamp, cached_filters, cached_columns = key
+                if (
+                    cached_id == dataset_id
+                    and cached_stamp == stamp
+                    and cached_filters == filters
+                    and wanted <= set(cached_columns)
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    break
+            else:
+                self.misses += 1
+                return None
+
+        # Callers add columns to what they are given, never hand out the entry
+        subset = df[columns] if list(df.columns) != list(columns) else df.copy(deep=False)
+        subset.attrs = dict(df.attrs)
+        return subset
+
+    def put(
+        self, dataset_id: int, stamp, filters, columns: list[str], df: pd.DataFrame
+    ):
+        nbytes = frame_nbytes(df)
+
+        # Never let one dataset flush everything else out
+        if nbytes > self.max_bytes:
+            return
+
+        key = (dataset_id, stamp, filters, tuple(columns))
+        cached = df.copy(deep=False)
+        cached.attrs = dict(df.attrs)
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+
+            self._entries[key] = (cached, nbytes)
+            self._nbytes += nbytes
+
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted_nbytes) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+                self.evictions += 1
+
+    def invalidate(self, dataset_id: int):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == dataset_id]:
+                _, nbytes = self._entries.pop(key)
+                self._nbytes -= nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._nbytes,
+                "max_bytes": self.max_bytes,
+            }
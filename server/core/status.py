@@ -0,0 +1,119 @@
+import json
+import logging
+import time
+
+import redis
+
+from server.utils import get_env
+
+logger = logging.getLogger(__name__)
+
+STATUS_KEY_PREFIX = "crosspost:status"
+TERMINAL_STATUSES = ("complete", "error")
+
+# The last event per dataset outlives any realistic job, it only saves new
+# subscribers a database query
+LAST_STATUS_TTL = 24 * 60 * 60
+
+
+class StatusPublisher:
+    """
+    Dataset job status over Redis pub/sub. Every event is published on the
+    dataset's channel and also kept as the dataset's last event, so a new
+    subscriber starts from the current state without asking Postgres.
+
+    Events are dicts with status, status_message and progress (0-100, or
+    None when unknown).
+    """
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    def _channel(self, dataset_id: int) -> str:
+        return f"{STATUS_KEY_PREFIX}:{dataset_id}"
+
+    def _last_key(self, dataset_id: int) -> str:
+        return f"{STATUS_KEY_PREFIX}:{dataset_id}:last"
+
+    def publish(
+        self,
+        dataset_id: int,
+        status: str,
+        status_message: str | None = None,
+        progress: float | None = None,
+    ):
+        if progress is None and status in TERMINAL_STATUSES:
+            progress = 100
+
+        payload = json.dumps(
+            {
+                "status": status,
+                "status_message": status_message,
+                "progress": round(progress, 1) if progress is not None else None,
+            }
+        )
+
+        # Status delivery is best effort, the database stays authoritative
+        try:
+            pipeline = self.client.pipeline()
+            pipeline.set(self._last_key(dataset_id), payload, ex=LAST_STATUS_TTL)
+            pipeline.publish(self._channel(dataset_id), payload)
+            pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning("Failed to publish status of dataset %d: %s", dataset_id, e)
+
+    def last(self, dataset_id: int) -> dict | None:
+        payload = self.client.get(self._last_key(dataset_id))
+        return json.loads(payload) if payload is not None else None
+
+    def subscribe(self, dataset_id: int, heartbeat: float = 15) -> "StatusSubscription":
+        """
+        Start listening on the dataset's channel. Subscribe before reading
+        last() to not miss an event published in between.
+        """
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel(dataset_id))
+        return StatusSubscription(pubsub, heartbeat)
+
+
+class StatusSubscription:
+    """
+    Iterator over a dataset's status events as they are published. Yields
+    None whenever heartbeat seconds pass without one. Must be closed.
+    """
+
+    def __init__(self, pubsub, heartbeat: float):
+        self.pubsub = pubsub
+        self.heartbeat = heartbeat
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> dict | None:
+        deadline = time.monotonic() + self.heartbeat
+
+        while True:
+            message = self.pubsub.get_message(
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+
+            if message is not None and message["type"] == "message":
+                return json.loads(message["data"])
+
+            if time.monotonic() >= deadline:
+                return None
+
+    def close(self):
+        self.pubsub.close()
+
+
+_status_publisher: StatusPublisher | None = None
+
+
+def get_status_publisher() -> StatusPublisher:
+    global _status_publisher
+
+    if _status_publisher is None:
+        _status_publisher = StatusPublisher(redis.Redis.from_url(get_env("REDIS_URL")))
+
+    return _status_publisher
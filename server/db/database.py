@@ -1,9 +1,15 @@
 import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
 import psycopg2
-import os
 from dotenv import load_dotenv
 from psycopg2.extras import RealDictCursor
 from psycopg2.extras import execute_batch
+from psycopg2.pool import ThreadedConnectionPool
 
 load_dotenv()
 postgres_host = os.getenv("POSTGRES_HOST", "localhost")
@@ -12,18 +18,40 @@ postgres_user = os.getenv("POSTGRES_USER", "postgres")
 postgres_password = os.getenv("POSTGRES_PASSWORD", "postgres")
 postgres_db = os.getenv("POSTGRES_DB", "postgres")
 
+# Pool sizing, per process. Gunicorn runs one pool per worker process, so
+# the server-wide ceiling is roughly workers * POSTGRES_POOL_MAX.
+postgres_pool_min = int(os.getenv("POSTGRES_POOL_MIN", 1))
+postgres_pool_max = int(os.getenv("POSTGRES_POOL_MAX", 10))
+# Connections idle for longer than this are pinged before being handed out
+postgres_pool_healthcheck_interval = float(
+    os.getenv("POSTGRES_POOL_HEALTHCHECK_INTERVAL", 30)
+)
+
 from server.exceptions import DatabaseNotConfiguredException
 
 
 class PostgresConnector:
     """
-    Simple PostgreSQL connector (single connection).
+    PostgreSQL connector backed by a thread-safe connection pool.
+
+    Every call checks a connection out of the pool for the duration of a
+    single transaction and returns it afterwards, so concurrent requests
+    never share a transaction.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        min_connections: int = postgres_pool_min,
+        max_connections: int = postgres_pool_max,
+        healthcheck_interval: float = postgres_pool_healthcheck_interval,
+    ):
+        if min_connections < 0 or max_connections < max(min_connections, 1):
+            raise ValueError("Invalid connection pool size")
 
         try:
-            self.connection = psycopg2.connect(
+            self.pool = ThreadedConnectionPool(
+                min_connections,
+                max_connections,
                 host=postgres_host,
                 port=postgres_port,
                 user=postgres_user,
@@ -35,28 +63,149 @@ class PostgresConnector:
                 f"Ensure database is up and running: {e}"
             )
 
-        self.connection.autocommit = False
+        self.healthcheck_interval = healthcheck_interval
+
+        # ThreadedConnectionPool raises when exhausted, block callers instead
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._last_used: dict[int, float] = {}
+
+    # private
+    def _is_healthy(self, connection) -> bool:
+        if connection.closed:
+            return False
+
+        last_used = self._last_used.get(id(connection))
+        if (
+            last_used is not None
+            and time.monotonic() - last_used < self.healthcheck_interval
+        ):
+            return True
 
-    def execute(self, query, params=None, fetch=False) -> list:
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                cursor.execute(query, params)
-                result = cursor.fetchall() if fetch else None
-            self.connection.commit()
-            return result
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        self._slots.acquire()
+        try:
+            connection = self.pool.getconn()
+
+            # A stale connection is discarded and replaced by a fresh one
+            if not self._is_healthy(connection):
+                self._last_used.pop(id(connection), None)
+                self.pool.putconn(connection, close=True)
+                connection = self.pool.getconn()
+
+            connection.autocommit = False
+            return connection
+        except psycopg2.OperationalError as e:
+            self._slots.release()
+            raise DatabaseNotConfiguredException(
+                f"Ensure database is up and running: {e}"
+            )
         except Exception:
-            self.connection.rollback()
+            self._slots.release()
             raise
 
-    def execute_batch(self, query, values):
+    def _release(self, connection):
         try:
-            with self.connection.cursor(cursor_factory=RealDictCursor) as cursor:
-                execute_batch(cursor, query, values)
-            self.connection.commit()
+            if connection.closed:
+                self._last_used.pop(id(connection), None)
+                self.pool.putconn(connection, close=True)
+            else:
+                self._last_used[id(connection)] = time.monotonic()
+                self.pool.putconn(connection)
+        finally:
+            self._slots.release()
+
+    # public
+    @contextmanager
+    def connection(self):
+        """
+        Check out a connection for one transaction. Commits on success,
+        rolls back on error and always returns the connection to the pool.
+        """
+        connection = self._checkout()
+        try:
+            yield connection
+            connection.commit()
         except Exception:
-            self.connection.rollback()
+            if not connection.closed:
+                connection.rollback()
             raise
+        finally:
+            self._release(connection)
+
+    @contextmanager
+    def autocommit_connection(self):
+        """
+        Check out a connection in autocommit mode, for statements that can't
+        run inside a transaction block such as DETACH PARTITION CONCURRENTLY.
+        """
+        connection = self._checkout()
+        try:
+            connection.autocommit = True
+            yield connection
+        finally:
+            self._release(connection)
+
+    def execute(self, query, params=None, fetch=False) -> list:
+        with self.connection() as connection:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall() if fetch else None
+
+    def stream(
+        self, query, params=None, chunk_size: int = 50_000
+    ) -> Iterator[tuple[list[str], list[tuple]]]:
+        """
+        Run a query on a named server-side cursor and yield (columns, rows)
+        chunks of at most chunk_size plain tuples, so the full result never
+        has to fit in memory. The connection stays checked out until the
+        iterator is exhausted or closed.
+        """
+        with self.connection() as connection:
+            with connection.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(query, params)
+
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+
+                    columns = [column.name for column in cursor.description]
+                    yield columns, rows
+
+    def execute_batch(self, query, values):
+        with self.connection() as connection:
+            with connection.cursor(cursor_factory=RealDictCursor) as cursor:
+                execute_batch(cursor, query, values)
 
     def close(self):
-        if self.connection:
-            self.connection.close()
+        if self.pool and not self.pool.closed:
+            self.pool.closeall()
+
+
+_connector: PostgresConnector | None = None
+_connector_pid: int | None = None
+_connector_lock = threading.Lock()
+
+
+def get_connector() -> PostgresConnector:
+    """
+    Process-wide connector, created on first use so that forked worker
+    processes each open their own pool instead of inheriting sockets.
+    """
+    global _connector, _connector_pid
+
+    with _connector_lock:
+        if _connector is None or _connector_pid != os.getpid():
+            _connector = PostgresConnector()
+            _connector_pid = os.getpid()
+
+    return _connector
@@ -0,0 +1,84 @@
+import logging
+import re
+from pathlib import Path
+
+from server.db.database import PostgresConnector
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+# Arbitrary key, serialises concurrent migrators (e.g. several API containers)
+MIGRATION_LOCK_KEY = 74810321
+
+
+def discover_migrations(directory: Path = MIGRATIONS_DIR) -> list[tuple[int, str, Path]]:
+    migrations = []
+
+    for path in directory.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            continue
+
+        migrations.append((int(match.group(1)), match.group(2), path))
+
+    migrations.sort()
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError(f"Duplicate migration versions in {directory}")
+
+    return migrations
+
+
+def apply_migrations(db: PostgresConnector, directory: Path = MIGRATIONS_DIR) -> list[int]:
+    """
+    Apply every migration newer than the database's recorded schema version.
+    Each migration runs in its own transaction, so a failure leaves earlier
+    migrations applied and the failing one rolled back.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+    applied = []
+
+    for version, name, path in discover_migrations(directory):
+        with db.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_KEY,))
+                cursor.execute(
+                    "SELECT 1 FROM schema_migrations WHERE version = %s", (version,)
+                )
+                if cursor.fetchone():
+                    continue
+
+                logger.info("Applying migration %04d_%s", version, name)
+                cursor.execute(path.read_text())
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name),
+                )
+
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from server.db.database import get_connector
+
+    logging.basicConfig(level=logging.INFO)
+
+    applied_versions = apply_migrations(get_connector())
+    if applied_versions:
+        print(f"Applied migrations: {', '.join(map(str, applied_versions))}")
+    else:
+        print("Database schema is up to date")
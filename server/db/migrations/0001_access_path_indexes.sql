@@ -0,0 +1,7 @@
+-- Secondary indexes for the access paths used by DatasetManager.
+-- (dataset_id, dt) also serves plain dataset_id lookups and deletes.
+CREATE INDEX IF NOT EXISTS events_dataset_dt_idx ON events (dataset_id, dt);
+CREATE INDEX IF NOT EXISTS events_dataset_source_idx ON events (dataset_id, source);
+CREATE INDEX IF NOT EXISTS events_dataset_author_idx ON events (dataset_id, author);
+
+CREATE INDEX IF NOT EXISTS datasets_user_id_idx ON datasets (user_id);
@@ -0,0 +1,84 @@
+-- Rebuild events as a table LIST-partitioned by dataset_id, with one
+-- partition (events_<dataset_id>) per dataset. Deleting or reloading a
+-- dataset then drops/attaches a partition instead of deleting rows.
+-- DatasetManager creates and swaps partitions from here on; rows for a
+-- dataset without its own partition land in events_default.
+
+-- Keep the id sequence alive when the old table is dropped
+ALTER SEQUENCE events_id_seq OWNED BY NONE;
+
+CREATE TABLE events_partitioned (
+    /* Required Fields */
+    id INTEGER NOT NULL DEFAULT nextval('events_id_seq'),
+    dataset_id INTEGER NOT NULL,
+
+    post_id VARCHAR(255) NOT NULL,
+    type VARCHAR(255) NOT NULL,
+
+    author VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    timestamp BIGINT NOT NULL,
+    date DATE NOT NULL,
+    dt TIMESTAMP NOT NULL,
+    hour INTEGER NOT NULL,
+    weekday VARCHAR(255) NOT NULL,
+
+    /* Posts Only */
+    title TEXT,
+
+    /* Comments Only*/
+    parent_id VARCHAR(255),
+    reply_to VARCHAR(255),
+    source VARCHAR(255) NOT NULL,
+
+    /* NLP Fields */
+    topic VARCHAR(255),
+    topic_confidence FLOAT,
+
+    ner_entities JSONB,
+
+    emotion_anger FLOAT,
+    emotion_disgust FLOAT,
+    emotion_fear FLOAT,
+    emotion_joy FLOAT,
+    emotion_sadness FLOAT,
+
+    -- Primary keys on partitioned tables must include the partition key
+    PRIMARY KEY (dataset_id, id),
+    FOREIGN KEY (dataset_id) REFERENCES datasets(id) ON DELETE CASCADE
+) PARTITION BY LIST (dataset_id);
+
+CREATE TABLE events_default PARTITION OF events_partitioned DEFAULT;
+
+DO $$
+DECLARE
+    dataset RECORD;
+BEGIN
+    FOR dataset IN SELECT id FROM datasets LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF events_partitioned FOR VALUES IN (%s)',
+            'events_' || dataset.id,
+            dataset.id
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO events_partitioned
+SELECT
+    id, dataset_id, post_id, type, author, content, timestamp, date, dt,
+    hour, weekday, title, parent_id, reply_to, source, topic,
+    topic_confidence, ner_entities, emotion_anger, emotion_disgust,
+    emotion_fear, emotion_joy, emotion_sadness
+FROM events;
+
+DROP TABLE events;
+ALTER TABLE events_partitioned RENAME TO events;
+ALTER TABLE events RENAME CONSTRAINT events_partitioned_pkey TO events_pkey;
+ALTER TABLE events
+    RENAME CONSTRAINT events_partitioned_dataset_id_fkey TO events_dataset_id_fkey;
+ALTER SEQUENCE events_id_seq OWNED BY events.id;
+
+-- Recreate the 0001 access-path indexes on the partitioned table
+CREATE INDEX events_dataset_dt_idx ON events (dataset_id, dt);
+CREATE INDEX events_dataset_source_idx ON events (dataset_id, source);
+CREATE INDEX events_dataset_author_idx ON events (dataset_id, author);
@@ -0,0 +1,22 @@
+-- One row per (dataset, source, type, post_id). Ingest enforces this with
+-- ON CONFLICT, so reads no longer need to deduplicate.
+
+-- Clean up duplicates left by older loads, keeping the earliest row
+DELETE FROM events
+WHERE (dataset_id, id) IN (
+    SELECT dataset_id, id
+    FROM (
+        SELECT
+            dataset_id,
+            id,
+            row_number() OVER (
+                PARTITION BY dataset_id, source, type, post_id
+                ORDER BY id
+            ) AS occurrence
+        FROM events
+    ) AS ranked
+    WHERE occurrence > 1
+);
+
+ALTER TABLE events
+    ADD CONSTRAINT events_dataset_event_key UNIQUE (dataset_id, source, type, post_id);
@@ -0,0 +1,56 @@
+-- Versioned dataset content. Each dataset partition events_<id> is itself
+-- LIST-partitioned by version, with one table events_<id>_v<n> per load.
+-- A reload writes the next version off to the side, attaches it and flips
+-- datasets.current_version in one transaction; readers only ever select
+-- the current version, so they never see a half-written load. Superseded
+-- versions are dropped later by the collect_dataset_versions task.
+
+ALTER TABLE datasets ADD COLUMN current_version INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE events ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+-- Unique constraints must cover every partitioning column
+ALTER TABLE events DROP CONSTRAINT events_pkey;
+ALTER TABLE events ADD PRIMARY KEY (dataset_id, version, id);
+
+ALTER TABLE events DROP CONSTRAINT events_dataset_event_key;
+ALTER TABLE events
+    ADD CONSTRAINT events_dataset_event_key
+    UNIQUE (dataset_id, version, source, type, post_id);
+
+-- Move each existing dataset partition under a version-partitioned parent
+-- as version 0
+DO $$
+DECLARE
+    dataset_partition RECORD;
+BEGIN
+    FOR dataset_partition IN
+        SELECT
+            c.relname AS name,
+            substring(c.relname FROM '^events_(\d+)$')::int AS dataset_id
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'events'::regclass
+          AND c.relname ~ '^events_\d+$'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE events DETACH PARTITION %I',
+            dataset_partition.name
+        );
+        EXECUTE format(
+            'ALTER TABLE %I RENAME TO %I',
+            dataset_partition.name,
+            dataset_partition.name || '_v0'
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF events FOR VALUES IN (%s) '
+            'PARTITION BY LIST (version)',
+            dataset_partition.name,
+            dataset_partition.dataset_id
+        );
+        EXECUTE format(
+            'ALTER TABLE %I ATTACH PARTITION %I FOR VALUES IN (0)',
+            dataset_partition.name,
+            dataset_partition.name || '_v0'
+        );
+    END LOOP;
+END $$;
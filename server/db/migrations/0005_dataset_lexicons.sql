@@ -0,0 +1,4 @@
+-- Marker lexicons a dataset's owner added to or replaced in the built-in
+-- ones of the cultural analysis, as {category: [phrase, ...]}. NULL means
+-- the built-in lexicon only.
+ALTER TABLE datasets ADD COLUMN lexicons JSONB;
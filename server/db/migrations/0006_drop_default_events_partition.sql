@@ -0,0 +1,40 @@
+-- Drop events_default so dataset partitions can be removed with
+-- DETACH PARTITION CONCURRENTLY, which Postgres refuses while the parent
+-- has a default partition. DatasetManager creates a dataset's partition
+-- before writing any of its events, so only datasets created before that
+-- have rows here. They get their own partition at their current version,
+-- rows of any other version were never read and are dropped with it.
+
+ALTER TABLE events DETACH PARTITION events_default;
+
+DO $$
+DECLARE
+    dataset RECORD;
+BEGIN
+    FOR dataset IN
+        SELECT id, current_version
+        FROM datasets
+        WHERE to_regclass('events_' || id) IS NULL
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF events FOR VALUES IN (%s) '
+            'PARTITION BY LIST (version)',
+            'events_' || dataset.id,
+            dataset.id
+        );
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF %I FOR VALUES IN (%s)',
+            'events_' || dataset.id || '_v' || dataset.current_version,
+            'events_' || dataset.id,
+            dataset.current_version
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO events
+SELECT legacy.*
+FROM events_default legacy
+JOIN datasets ON datasets.id = legacy.dataset_id
+    AND datasets.current_version = legacy.version;
+
+DROP TABLE events_default;
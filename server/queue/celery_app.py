@@ -6,11 +6,19 @@ load_dotenv()
 REDIS_URL = get_env("REDIS_URL")
 
 
+# Task names, so the API can enqueue by name without importing the worker
+# code and with it torch and transformers
+PROCESS_DATASET_TASK = "server.queue.tasks.process_dataset"
+FETCH_AND_PROCESS_DATASET_TASK = "server.queue.tasks.fetch_and_process_dataset"
+
+
 def create_celery():
     celery = Celery(
         "ethnograph",
         broker=REDIS_URL,
         backend=REDIS_URL,
+        # Only imported by the worker, when it starts
+        include=["server.queue.tasks"],
     )
     celery.conf.task_serializer = "json"
     celery.conf.result_serializer = "json"
@@ -19,5 +27,3 @@ def create_celery():
 
 
 celery = create_celery()
-
-from server.queue import tasks
@@ -1,53 +1,172 @@
 from time import time
 
+import os
+
 import pandas as pd
 import logging
 
-from server.queue.celery_app import celery
+from server.queue.celery_app import (
+    FETCH_AND_PROCESS_DATASET_TASK,
+    PROCESS_DATASET_TASK,
+    celery,
+)
 from server.analysis.enrichment import DatasetEnrichment
-from server.db.database import PostgresConnector
+from server.analysis.stat_gen import ANALYSES, StatGen
+from server.db.database import get_connector
+from server.core.cache import analysis_key, get_result_cache
 from server.core.datasets import DatasetManager
+from server.core.status import get_status_publisher
 from server.connectors.registry import get_available_connectors
 
 logger = logging.getLogger(__name__)
 
+# "replace" rewrites the whole dataset, "append" only enriches and upserts
+# events that are new or changed since the last load
+WRITE_MODES = ("replace", "append")
+
+# How long the previous version of a reloaded dataset is kept for requests
+# still reading it before it is dropped
+version_retention_seconds = int(os.getenv("DATASET_VERSION_RETENTION", 300))
+
+
+def _dataset_manager() -> DatasetManager:
+    return DatasetManager(get_connector(), status_publisher=get_status_publisher())
+
+
+def _progress(dataset_id: int, status: str, start: float, end: float):
+    """
+    Progress callback mapping a stage's fraction done onto start-end
+    percent of the whole job. Only published, never written to Postgres.
+    """
+    status_publisher = get_status_publisher()
+
+    def report(fraction: float, message: str):
+        status_publisher.publish(
+            dataset_id, status, message, start + (end - start) * fraction
+        )
+
+    return report
+
+
+def _existing_events(dataset_manager: DatasetManager, dataset_id: int, mode: str):
+    if mode not in WRITE_MODES:
+        raise ValueError(f"Unknown write mode: {mode}")
+
+    if mode == "append":
+        return dataset_manager.get_event_fingerprints(dataset_id)
+
+    return None
+
+
+def _write_events(
+    dataset_manager: DatasetManager, dataset_id: int, df: pd.DataFrame, mode: str
+) -> int:
+    if mode == "append":
+        rows = dataset_manager.upsert_dataset_content(dataset_id, df)
+    else:
+        rows = dataset_manager.save_dataset_content(dataset_id, df)
+        collect_dataset_versions.apply_async(
+            (dataset_id,), countdown=version_retention_seconds
+        )
+
+    # Appends keep the version, so results cached for it are now stale
+    get_result_cache().invalidate(dataset_id)
+    return rows
 
-@celery.task(bind=True, max_retries=3)
-def process_dataset(self, dataset_id: int, posts: list, topics: dict):
-    db = PostgresConnector()
-    dataset_manager = DatasetManager(db)
+
+def _complete(dataset_manager: DatasetManager, dataset_id: int, message: str):
+    dataset_manager.set_dataset_status(dataset_id, "complete", message)
+    warm_dataset_results.delay(dataset_id)
+
+
+@celery.task(bind=True, max_retries=5)
+def collect_dataset_versions(self, dataset_id: int):
+    dataset_manager = DatasetManager(get_connector())
+
+    try:
+        dropped = dataset_manager.drop_stale_versions(dataset_id)
+    except Exception as e:
+        # Usually a lock timeout behind a long-running read, try again later
+        raise self.retry(exc=e, countdown=version_retention_seconds)
+
+    if dropped:
+        logger.info("Dropped versions %s of dataset %d", dropped, dataset_id)
+
+
+@celery.task(bind=True)
+def warm_dataset_results(self, dataset_id: int):
+    dataset_manager = DatasetManager(get_connector())
+    result_cache = get_result_cache()
+    stat_gen = StatGen()
+
+    # Unfiltered requests carry an empty filters dict, see get_request_filters
+    filters = {}
+
+    for analysis in ANALYSES:
+        stamp = dataset_manager.get_content_stamp(dataset_id)
+
+        # Rewritten or deleted in the meantime, a newer warm-up will follow
+        if stamp is None:
+            return
+
+        # One failing analysis mustn't keep the others from being warmed,
+        # a request for it computes it again and reports the error
+        try:
+            options = stat_gen.dataset_options(analysis, dataset_manager, dataset_id)
+            result_cache.get_or_compute(
+                dataset_id,
+                stamp,
+                analysis_key(analysis, options),
+                filters,
+                lambda: stat_gen.run(analysis, dataset_manager, dataset_id, filters, options),
+            )
+        except Exception:
+            logger.exception(
+                "Warming %s results of dataset %d failed", analysis, dataset_id
+            )
+
+
+@celery.task(bind=True, max_retries=3, name=PROCESS_DATASET_TASK)
+def process_dataset(
+    self, dataset_id: int, posts: list, topics: dict, mode: str = "replace"
+):
+    dataset_manager = _dataset_manager()
 
     try:
         df = pd.DataFrame(posts)
 
         dataset_manager.set_dataset_status(
-            dataset_id, "processing", "NLP Processing Started"
+            dataset_id, "processing", "NLP Processing Started", progress=0
         )
 
-        processor = DatasetEnrichment(df, topics)
-        enriched_df = processor.enrich()
+        existing_events = _existing_events(dataset_manager, dataset_id, mode)
+        processor = DatasetEnrichment(df, topics, existing_events)
+        enriched_df = processor.enrich(_progress(dataset_id, "processing", 0, 90))
 
-        dataset_manager.save_dataset_content(dataset_id, enriched_df)
-        dataset_manager.set_dataset_status(
-            dataset_id, "complete", "NLP Processing Completed Successfully"
-        )
+        _progress(dataset_id, "processing", 90, 100)(0, "Saving events")
+        _write_events(dataset_manager, dataset_id, enriched_df, mode)
+        _complete(dataset_manager, dataset_id, "NLP Processing Completed Successfully")
     except Exception as e:
         dataset_manager.set_dataset_status(
             dataset_id, "error", f"An error occurred: {e}"
         )
 
 
-@celery.task(bind=True, max_retries=3)
+@celery.task(bind=True, max_retries=3, name=FETCH_AND_PROCESS_DATASET_TASK)
 def fetch_and_process_dataset(
-    self, dataset_id: int, source_info: list[dict], topics: dict
+    self,
+    dataset_id: int,
+    source_info: list[dict],
+    topics: dict,
+    mode: str = "replace",
 ):
     connectors = get_available_connectors()
-    db = PostgresConnector()
-    dataset_manager = DatasetManager(db)
+    dataset_manager = _dataset_manager()
+    report_fetch = _progress(dataset_id, "fetching", 0, 30)
     posts = []
 
     try:
-        for metadata in source_info:
+        for index, metadata in enumerate(source_info):
             fetch_start = time()
             name = metadata["name"]
             search = metadata.get("search")
@@ -59,6 +178,7 @@ def fetch_and_process_dataset(
                 search=search, category=category, post_limit=limit
             )
             posts.extend(post.to_dict() for post in raw_posts)
+            report_fetch((index + 1) / len(source_info), f"Fetched posts from {name}")
 
         fetch_time = time() - fetch_start
         df = pd.DataFrame(posts)
@@ -66,17 +186,26 @@ def fetch_and_process_dataset(
         nlp_start = time()
 
         dataset_manager.set_dataset_status(
-            dataset_id, "processing", "NLP Processing Started"
+            dataset_id, "processing", "NLP Processing Started", progress=30
         )
 
-        processor = DatasetEnrichment(df, topics)
-        enriched_df = processor.enrich()
+        existing_events = _existing_events(dataset_manager, dataset_id, mode)
+        processor = DatasetEnrichment(df, topics, existing_events)
+        enriched_df = processor.enrich(_progress(dataset_id, "processing", 30, 90))
 
         nlp_time = time() - nlp_start
 
-        dataset_manager.save_dataset_content(dataset_id, enriched_df)
-        dataset_manager.set_dataset_status(
-            dataset_id, "complete", f"Completed Successfully. Fetch time: {fetch_time:.2f}s, NLP time: {nlp_time:.2f}s"
+        _progress(dataset_id, "processing", 90, 100)(0, "Saving events")
+
+        insert_start = time()
+        rows = _write_events(dataset_manager, dataset_id, enriched_df, mode)
+        insert_time = time() - insert_start
+
+        _complete(
+            dataset_manager,
+            dataset_id,
+            f"Completed Successfully. Fetch time: {fetch_time:.2f}s, NLP time: {nlp_time:.2f}s, "
+            f"Insert time: {insert_time:.2f}s ({rows / max(insert_time, 1e-9):.0f} rows/s)",
         )
     except Exception as e:
         dataset_manager.set_dataset_status(
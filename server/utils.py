@@ -50,6 +50,29 @@ def get_request_filters() -> dict:
 
     return filters
 
+
+GRAPH_REDUCTION_PARAMS = ["min_edge_weight", "k_core", "collapse_below_degree", "top_k_edges"]
+
+
+def get_graph_reduction() -> dict:
+    reduction = {}
+
+    for param in GRAPH_REDUCTION_PARAMS:
+        value = request.args.get(param)
+        if not value:
+            continue
+
+        try:
+            reduction[param] = int(value)
+        except ValueError as err:
+            raise ValueError(f"{param} must be a positive integer") from err
+
+        if reduction[param] < 1:
+            raise ValueError(f"{param} must be a positive integer")
+
+    return reduction
+
+
 def get_env(name: str) -> str:
     value = os.getenv(name)
     if not value: